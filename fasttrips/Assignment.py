@@ -24,6 +24,7 @@ __license__   = """
 """
 import configparser
 import datetime
+import logging
 import math
 import multiprocessing
 import os
@@ -166,6 +167,9 @@ class Assignment(object):
     #: Debug: include debug columns in output
     DEBUG_OUTPUT_COLUMNS            = False
 
+    #: Debug: log every bumped trip and the full bump wait table while loading vehicles with capacity
+    DEBUG_BUMP_TRIPS                = False
+
     #: Fare zone symmetry. If True, will assume fare zone symmetry.  That is, if fare_id X is
     # configured from origin zone A to destination zone B, and there is no fare configured
     # from zone B to zone A, we'll assume that fare_id X also applies.
@@ -309,6 +313,7 @@ class Assignment(object):
                       'debug_trace_only'                :'False',
                       'debug_num_trips'                 :-1,
                       'debug_output_columns'            :'False',
+                      'debug_bump_trips'                :'False',
                       'fare_zone_symmetry'              :'False',
                       'prepend_route_id_to_trip_id'     :'False',
                       'number_of_processes'             :0,
@@ -369,6 +374,7 @@ class Assignment(object):
         Assignment.DEBUG_TRACE_ONLY              = parser.getboolean('fasttrips','debug_trace_only')
         Assignment.DEBUG_NUM_TRIPS               = parser.getint    ('fasttrips','debug_num_trips')
         Assignment.DEBUG_OUTPUT_COLUMNS          = parser.getboolean('fasttrips','debug_output_columns')
+        Assignment.DEBUG_BUMP_TRIPS              = parser.getboolean('fasttrips','debug_bump_trips')
         Assignment.FARE_ZONE_SYMMETRY            = parser.getboolean('fasttrips','fare_zone_symmetry')
         Assignment.PREPEND_ROUTE_ID_TO_TRIP_ID   = parser.getboolean('fasttrips','prepend_route_id_to_trip_id')
         Assignment.NUMBER_OF_PROCESSES           = parser.getint    ('fasttrips','number_of_processes')
@@ -551,6 +557,7 @@ class Assignment(object):
         parser.set('fasttrips','debug_trace_only',              'True' if Assignment.DEBUG_TRACE_ONLY else 'False')
         parser.set('fasttrips','debug_num_trips',               '%d' % Assignment.DEBUG_NUM_TRIPS)
         parser.set('fasttrips','debug_output_columns',          'True' if Assignment.DEBUG_OUTPUT_COLUMNS else 'False')
+        parser.set('fasttrips','debug_bump_trips',              'True' if Assignment.DEBUG_BUMP_TRIPS else 'False')
         parser.set('fasttrips','fare_zone_symmetry',            'True' if Assignment.FARE_ZONE_SYMMETRY else 'False')
         parser.set('fasttrips','prepend_route_id_to_trip_id',   'True' if Assignment.PREPEND_ROUTE_ID_TO_TRIP_ID else 'False')
         parser.set('fasttrips','number_of_processes',           '%d' % Assignment.NUMBER_OF_PROCESSES)
@@ -598,7 +605,7 @@ class Assignment(object):
         if Assignment.MSA_RESULTS:
             overcap_col = Trip.SIM_COL_VEH_MSA_OVERCAP
 
-        if overcap_col not in list(stop_times_df.columns.values):
+        if overcap_col not in stop_times_df.columns:
             stop_times_df[overcap_col] = 0
 
         FastTripsLogger.debug("initialize_fasttrips_extension() overcap sum: %d" % stop_times_df[overcap_col].sum())
@@ -678,7 +685,7 @@ class Assignment(object):
         # these may not be in there since they're optional
         for optional_col in [Trip.TRIPS_COLUMN_DIRECTION_ID,
                              Trip.VEHICLES_COLUMN_TOTAL_CAPACITY]:
-            if optional_col not in veh_trips_df.columns.values:
+            if optional_col not in veh_trips_df.columns:
                 columns.remove(optional_col)
 
         veh_trips_df[            "iteration"] = iteration
@@ -1318,6 +1325,10 @@ class Assignment(object):
         pathdict = {}
         row_num  = 0
 
+        # hoisted out of the state loop; the extension returns times as minutes after the network build start
+        start_time = Assignment.NETWORK_BUILD_DATE_START_TIME
+        timedelta  = datetime.timedelta
+
         for path_num in range(path_costs.shape[0]):
 
             pathdict[path_num] = {}
@@ -1349,34 +1360,34 @@ class Assignment(object):
                 if hyperpath:
                     pathdict[path_num][PathSet.PATH_KEY_STATES].append( (ret_ints[row_num, 1], [
                         ret_doubles[row_num,0],                                                          # label,
-                        Assignment.NETWORK_BUILD_DATE_START_TIME + datetime.timedelta(minutes=ret_doubles[row_num,1]),  # departure/arrival time
+                        start_time + timedelta(minutes=ret_doubles[row_num,1]),                          # departure/arrival time
                         mode,                                                                            # departure/arrival mode
                         ret_ints[row_num,3],                                                             # trip id
                         ret_ints[row_num,4],                                                             # successor/predecessor
                         ret_ints[row_num,5],                                                             # sequence
                         ret_ints[row_num,6],                                                             # sequence succ/pred
-                        datetime.timedelta(minutes=ret_doubles[row_num,2]),                              # link time
+                        timedelta(minutes=ret_doubles[row_num,2]),                                       # link time
                         ret_doubles[row_num,3],                                                          # link fare
                         ret_doubles[row_num,4],                                                          # link cost
                         ret_doubles[row_num,5],                                                          # link distance
                         ret_doubles[row_num,6],                                                          # cost
-                        Assignment.NETWORK_BUILD_DATE_START_TIME + datetime.timedelta(minutes=ret_doubles[row_num,7])   # arrival/departure time
+                        start_time + timedelta(minutes=ret_doubles[row_num,7])                           # arrival/departure time
                     ] ) )
                 else:
                     pathdict[path_num][PathSet.PATH_KEY_STATES].append( (ret_ints[row_num, 1], [
-                        datetime.timedelta(minutes=ret_doubles[row_num,0]),                              # label,
-                        Assignment.NETWORK_BUILD_DATE_START_TIME + datetime.timedelta(minutes=ret_doubles[row_num,1]),  # departure/arrival time
+                        timedelta(minutes=ret_doubles[row_num,0]),                                       # label,
+                        start_time + timedelta(minutes=ret_doubles[row_num,1]),                          # departure/arrival time
                         mode,                                                                            # departure/arrival mode
                         ret_ints[row_num,3],                                                             # trip id
                         ret_ints[row_num,4],                                                             # successor/predecessor
                         ret_ints[row_num,5],                                                             # sequence
                         ret_ints[row_num,6],                                                             # sequence succ/pred
-                        datetime.timedelta(minutes=ret_doubles[row_num,2]),                              # link time
+                        timedelta(minutes=ret_doubles[row_num,2]),                                       # link time
                         ret_doubles[row_num,3],                                                          # link fare
-                        datetime.timedelta(minutes=ret_doubles[row_num,4]),                              # link cost
+                        timedelta(minutes=ret_doubles[row_num,4]),                                       # link cost
                         ret_doubles[row_num,5],                                                          # link dist
-                        datetime.timedelta(minutes=ret_doubles[row_num,6]),                              # cost
-                        Assignment.NETWORK_BUILD_DATE_START_TIME + datetime.timedelta(minutes=ret_doubles[row_num,7])   # arrival/departure time
+                        timedelta(minutes=ret_doubles[row_num,6]),                                       # cost
+                        start_time + timedelta(minutes=ret_doubles[row_num,7])                           # arrival/departure time
                     ] ) )
                 row_num += 1
 
@@ -1415,12 +1426,13 @@ class Assignment(object):
             FastTripsLogger.debug("find_passenger_vehicle_times(): input pathset_links_df len=%d\n%s" % \
                                   (len(pathset_links_df), pathset_links_df.loc[pathset_links_df[Passenger.TRIP_LIST_COLUMN_TRACE]==True].to_string()))
 
-        if Assignment.SIM_COL_PAX_BOARD_TIME in list(pathset_links_df.columns.values):
-            pathset_links_df.drop([Assignment.SIM_COL_PAX_BOARD_TIME,
-                                   Assignment.SIM_COL_PAX_ALIGHT_TIME,
-                                   Assignment.SIM_COL_PAX_OVERCAP], axis=1, inplace=True)
-        if Assignment.SIM_COL_PAX_OVERCAP_FRAC in list(pathset_links_df.columns.values):
-            pathset_links_df.drop([Assignment.SIM_COL_PAX_OVERCAP_FRAC], axis=1, inplace=True)
+        # drop whichever of these are there, in one call -- we'll set them again
+        drop_cols = [col for col in [Assignment.SIM_COL_PAX_BOARD_TIME,
+                                     Assignment.SIM_COL_PAX_ALIGHT_TIME,
+                                     Assignment.SIM_COL_PAX_OVERCAP,
+                                     Assignment.SIM_COL_PAX_OVERCAP_FRAC] if col in pathset_links_df.columns]
+        if len(drop_cols) > 0:
+            pathset_links_df.drop(drop_cols, axis=1, inplace=True)
 
         # FastTripsLogger.debug("pathset_links_df:\n%s\n" % pathset_links_df.head().to_string())
         if False: FastTripsLogger.debug("veh_trips_df:\n%s\n" % veh_trips_df.head().to_string())
@@ -1433,7 +1445,7 @@ class Assignment(object):
                          Trip.SIM_COL_VEH_OVERCAP_FRAC]
 
         # this one may not be here -- it's only present during capacity stuff
-        if Trip.SIM_COL_VEH_OVERCAP_FRAC not in list(veh_trips_df.columns.values):
+        if Trip.SIM_COL_VEH_OVERCAP_FRAC not in veh_trips_df.columns:
             veh_trip_cols.remove(Trip.SIM_COL_VEH_OVERCAP_FRAC)
 
         #This is a little long winded, but it cuts down on memory dramatically, but only copying
@@ -1510,8 +1522,11 @@ class Assignment(object):
         # only care about trips
         #passengers_df = passengers_df.loc[passengers_df[Passenger.PF_COL_ROUTE_ID].notnull()]
 
+        # only unbumped passengers board and alight
+        unbumped = passengers_df[Assignment.SIM_COL_PAX_BUMP_ITER].isnull()
+
         # Group to boards by counting trip_list_id_nums for a (trip_id, A_id as stop_id)
-        passenger_trips_boards = passengers_df.loc[passengers_df[Assignment.SIM_COL_PAX_BUMP_ITER].isnull(),  # unbumped passengers
+        passenger_trips_boards = passengers_df.loc[unbumped,
                                                    [Passenger.TRIP_LIST_COLUMN_TRIP_LIST_ID_NUM,
                                                     Trip.STOPTIMES_COLUMN_TRIP_ID_NUM,'A_id_num','A_seq']].groupby([Trip.STOPTIMES_COLUMN_TRIP_ID_NUM,'A_id_num','A_seq']).count()
         passenger_trips_boards.index.names = [Trip.STOPTIMES_COLUMN_TRIP_ID_NUM,
@@ -1519,7 +1534,7 @@ class Assignment(object):
                                               Trip.STOPTIMES_COLUMN_STOP_SEQUENCE]
 
         # And alights by counting path_ids for a (trip_id, B_id as stop_id)
-        passenger_trips_alights = passengers_df.loc[passengers_df[Assignment.SIM_COL_PAX_BUMP_ITER].isnull(),
+        passenger_trips_alights = passengers_df.loc[unbumped,
                                                     [Passenger.TRIP_LIST_COLUMN_TRIP_LIST_ID_NUM,
                                                      Trip.TRIPS_COLUMN_TRIP_ID_NUM,'B_id_num','B_seq']].groupby([Trip.TRIPS_COLUMN_TRIP_ID_NUM,'B_id_num','B_seq']).count()
         passenger_trips_alights.index.names = [Trip.STOPTIMES_COLUMN_TRIP_ID_NUM,
@@ -1614,7 +1629,7 @@ class Assignment(object):
 
         """
         # Drop these, we'll set them again
-        if Assignment.SIM_COL_PAX_ALIGHT_DELAY_MIN in list(pathset_links_df.columns.values):
+        if Assignment.SIM_COL_PAX_ALIGHT_DELAY_MIN in pathset_links_df.columns:
             pathset_links_df.drop([Assignment.SIM_COL_PAX_ALIGHT_DELAY_MIN,
                                    Assignment.SIM_COL_PAX_A_TIME,
                                    Assignment.SIM_COL_PAX_B_TIME,
@@ -1629,15 +1644,17 @@ class Assignment(object):
             ((pathset_links_df[Assignment.SIM_COL_PAX_ALIGHT_TIME]-pathset_links_df[Passenger.PF_COL_PAX_B_TIME]) / np.timedelta64(1, 'm'))
 
         #: todo: is there a more elegant way to take care of this?  some trips have times after midnight so they're the next day
-        pathset_links_df.loc[pathset_links_df[Assignment.SIM_COL_PAX_ALIGHT_DELAY_MIN]>22*60, Assignment.SIM_COL_PAX_BOARD_TIME ] = pathset_links_df[Assignment.SIM_COL_PAX_BOARD_TIME] - np.timedelta64(24, 'h')
-        pathset_links_df.loc[pathset_links_df[Assignment.SIM_COL_PAX_ALIGHT_DELAY_MIN]>22*60, Assignment.SIM_COL_PAX_ALIGHT_TIME] = pathset_links_df[Assignment.SIM_COL_PAX_ALIGHT_TIME] - np.timedelta64(24, 'h')
-        pathset_links_df.loc[pathset_links_df[Assignment.SIM_COL_PAX_ALIGHT_DELAY_MIN]>22*60, Assignment.SIM_COL_PAX_ALIGHT_DELAY_MIN] = \
+        next_day = pathset_links_df[Assignment.SIM_COL_PAX_ALIGHT_DELAY_MIN]>22*60
+        pathset_links_df.loc[next_day, Assignment.SIM_COL_PAX_BOARD_TIME ] = pathset_links_df[Assignment.SIM_COL_PAX_BOARD_TIME] - np.timedelta64(24, 'h')
+        pathset_links_df.loc[next_day, Assignment.SIM_COL_PAX_ALIGHT_TIME] = pathset_links_df[Assignment.SIM_COL_PAX_ALIGHT_TIME] - np.timedelta64(24, 'h')
+        pathset_links_df.loc[next_day, Assignment.SIM_COL_PAX_ALIGHT_DELAY_MIN] = \
             ((pathset_links_df[Assignment.SIM_COL_PAX_ALIGHT_TIME]-pathset_links_df[Passenger.PF_COL_PAX_B_TIME]) / np.timedelta64(1, 'm'))
 
         max_alight_delay_min = pathset_links_df[Assignment.SIM_COL_PAX_ALIGHT_DELAY_MIN].max()
         FastTripsLogger.debug("Biggest alight_delay = %f" % max_alight_delay_min)
         if max_alight_delay_min > 0:
-            FastTripsLogger.debug("\n%s" % pathset_links_df.sort_values(by=Assignment.SIM_COL_PAX_ALIGHT_DELAY_MIN, ascending=False).head().to_string())
+            # only the top few rows are logged, so don't sort the whole table for them
+            FastTripsLogger.debug("\n%s" % pathset_links_df.nlargest(5, Assignment.SIM_COL_PAX_ALIGHT_DELAY_MIN).to_string())
 
         # For trips, alight_time is the new B_time
         # Set A_time for links AFTER trip links by joining to next leg
@@ -1663,10 +1680,12 @@ class Assignment(object):
         # Set the new B time for those links -- link time for access/egress/xfer is travel time since wait times are in trip links
         pathset_links_df[Assignment.SIM_COL_PAX_B_TIME] = pathset_links_df[Assignment.SIM_COL_PAX_A_TIME] + pathset_links_df[Passenger.PF_COL_LINK_TIME]
         # For trip links, it's alight time
-        pathset_links_df.loc[pathset_links_df[Passenger.PF_COL_LINK_MODE]==PathSet.STATE_MODE_TRIP,   Assignment.SIM_COL_PAX_B_TIME] = pathset_links_df[Assignment.SIM_COL_PAX_ALIGHT_TIME]
+        trip_links   = pathset_links_df[Passenger.PF_COL_LINK_MODE]==PathSet.STATE_MODE_TRIP
+        access_links = pathset_links_df[Passenger.PF_COL_LINK_MODE]==PathSet.STATE_MODE_ACCESS
+        pathset_links_df.loc[trip_links,   Assignment.SIM_COL_PAX_B_TIME] = pathset_links_df[Assignment.SIM_COL_PAX_ALIGHT_TIME]
         # For access links, it doesn't change from the original pathfinding result
-        pathset_links_df.loc[pathset_links_df[Passenger.PF_COL_LINK_MODE]==PathSet.STATE_MODE_ACCESS, Assignment.SIM_COL_PAX_A_TIME] = pathset_links_df[Passenger.PF_COL_PAX_A_TIME]
-        pathset_links_df.loc[pathset_links_df[Passenger.PF_COL_LINK_MODE]==PathSet.STATE_MODE_ACCESS, Assignment.SIM_COL_PAX_B_TIME] = pathset_links_df[Passenger.PF_COL_PAX_B_TIME]
+        pathset_links_df.loc[access_links, Assignment.SIM_COL_PAX_A_TIME] = pathset_links_df[Passenger.PF_COL_PAX_A_TIME]
+        pathset_links_df.loc[access_links, Assignment.SIM_COL_PAX_B_TIME] = pathset_links_df[Passenger.PF_COL_PAX_B_TIME]
 
         # Now we only need to set the trip link's A time from the previous link's new_B_time
         next_trips = pathset_links_df[[
@@ -1692,12 +1711,14 @@ class Assignment(object):
 
         #: todo: is there a more elegant way to take care of this?  some trips have times after midnight so they're the next day
         #: if the linktime > 22 hours then the trip time is probably off by a day, so it's right after midnight -- back it up
-        pathset_links_df.loc[pathset_links_df[Assignment.SIM_COL_PAX_LINK_TIME]/ np.timedelta64(1, 'h') > 22, Assignment.SIM_COL_PAX_B_TIME   ] = pathset_links_df[Assignment.SIM_COL_PAX_B_TIME] - np.timedelta64(24, 'h')
-        pathset_links_df.loc[pathset_links_df[Assignment.SIM_COL_PAX_LINK_TIME]/ np.timedelta64(1, 'h') > 22, Assignment.SIM_COL_PAX_LINK_TIME] = pathset_links_df[Assignment.SIM_COL_PAX_B_TIME] - pathset_links_df[Assignment.SIM_COL_PAX_A_TIME]
+        next_day = pathset_links_df[Assignment.SIM_COL_PAX_LINK_TIME]/ np.timedelta64(1, 'h') > 22
+        pathset_links_df.loc[next_day, Assignment.SIM_COL_PAX_B_TIME   ] = pathset_links_df[Assignment.SIM_COL_PAX_B_TIME] - np.timedelta64(24, 'h')
+        pathset_links_df.loc[next_day, Assignment.SIM_COL_PAX_LINK_TIME] = pathset_links_df[Assignment.SIM_COL_PAX_B_TIME] - pathset_links_df[Assignment.SIM_COL_PAX_A_TIME]
 
         #: if the linktime < -22 hours then the trip time is probably off by a day, so it's right before midnight -- back it up
-        pathset_links_df.loc[pathset_links_df[Assignment.SIM_COL_PAX_LINK_TIME]/ np.timedelta64(-1, 'h') < -22, Assignment.SIM_COL_PAX_A_TIME   ] = pathset_links_df[Assignment.SIM_COL_PAX_A_TIME] - np.timedelta64(24, 'h')
-        pathset_links_df.loc[pathset_links_df[Assignment.SIM_COL_PAX_LINK_TIME]/ np.timedelta64(-1, 'h') < -22, Assignment.SIM_COL_PAX_LINK_TIME] = pathset_links_df[Assignment.SIM_COL_PAX_B_TIME] - pathset_links_df[Assignment.SIM_COL_PAX_A_TIME]
+        prev_day = pathset_links_df[Assignment.SIM_COL_PAX_LINK_TIME]/ np.timedelta64(-1, 'h') < -22
+        pathset_links_df.loc[prev_day, Assignment.SIM_COL_PAX_A_TIME   ] = pathset_links_df[Assignment.SIM_COL_PAX_A_TIME] - np.timedelta64(24, 'h')
+        pathset_links_df.loc[prev_day, Assignment.SIM_COL_PAX_LINK_TIME] = pathset_links_df[Assignment.SIM_COL_PAX_B_TIME] - pathset_links_df[Assignment.SIM_COL_PAX_A_TIME]
 
 
         # new wait time
@@ -1720,7 +1741,7 @@ class Assignment(object):
                               pathset_links_df_grouped[Assignment.SIM_COL_MISSED_XFER].sum()))
 
         # add missed_xfer to pathset_paths_df (replacing if it was there already)
-        if Assignment.SIM_COL_MISSED_XFER in list(pathset_paths_df.columns.values):
+        if Assignment.SIM_COL_MISSED_XFER in pathset_paths_df.columns:
             pathset_paths_df.drop([Assignment.SIM_COL_MISSED_XFER], axis=1, inplace=True)
 
         pathset_paths_df = pd.merge(left  =pathset_paths_df,
@@ -1841,29 +1862,22 @@ class Assignment(object):
             pathset_links_df[Assignment.SIM_COL_PAX_CHOSEN     ] = pd.Categorical( pathset_links_df[Assignment.SIM_COL_PAX_CHOSEN     ], categories=Assignment.CHOSEN_CATEGORIES, ordered=True)
             pathset_links_df[Assignment.SIM_COL_PAX_BOARD_STATE] = pd.Categorical( pathset_links_df[Assignment.SIM_COL_PAX_BOARD_STATE], categories=Assignment.BOARD_STATE_CATEGORICAL)
 
+            # trip links that aren't already bumped; these masks are shared by the board state updates below
+            unbumped_trip_links = pathset_links_df[Passenger.PF_COL_ROUTE_ID].notnull() & \
+                                  pathset_links_df[Assignment.SIM_COL_PAX_BUMP_ITER].isnull()
+            chosen_links        = unbumped_trip_links & (pathset_links_df[Assignment.SIM_COL_PAX_CHOSEN]>Assignment.CHOSEN_NOT_CHOSEN_YET)
+            unchosen_overcap    = unbumped_trip_links & (pathset_links_df[Assignment.SIM_COL_PAX_CHOSEN]==Assignment.CHOSEN_NOT_CHOSEN_YET) & \
+                                  (pathset_links_df[Assignment.SIM_COL_PAX_OVERCAP]>=0)
+
             # CHOSEN: Everyone who can board easily, do so
-            pathset_links_df.loc[ pathset_links_df[Passenger.PF_COL_ROUTE_ID].notnull() &                               # trip links only
-                                  pathset_links_df[Assignment.SIM_COL_PAX_BUMP_ITER].isnull() &                         # not already bumped
-                                  (pathset_links_df[Assignment.SIM_COL_PAX_CHOSEN]>Assignment.CHOSEN_NOT_CHOSEN_YET)&   # chosen
-                                  (pathset_links_df[Assignment.SIM_COL_PAX_OVERCAP]<0),                                 # can board
-                                        Assignment.SIM_COL_PAX_BOARD_STATE ] = "board_easy"
+            pathset_links_df.loc[ chosen_links & (pathset_links_df[Assignment.SIM_COL_PAX_OVERCAP]<0),  # can board
+                                  Assignment.SIM_COL_PAX_BOARD_STATE ] = "board_easy"
             # CHOSEN:  Everyone who can squeeze in, do so
-            pathset_links_df.loc[ pathset_links_df[Passenger.PF_COL_ROUTE_ID].notnull() &                               # trip links only
-                                  pathset_links_df[Assignment.SIM_COL_PAX_BUMP_ITER].isnull() &                         # not already bumped
-                                  (pathset_links_df[Assignment.SIM_COL_PAX_CHOSEN]>Assignment.CHOSEN_NOT_CHOSEN_YET)&   # chosen
-                                  (pathset_links_df[Assignment.SIM_COL_PAX_OVERCAP]==0),                                # can barely board
-                                       Assignment.SIM_COL_PAX_BOARD_STATE ] = "boarded"
+            pathset_links_df.loc[ chosen_links & (pathset_links_df[Assignment.SIM_COL_PAX_OVERCAP]==0), # can barely board
+                                  Assignment.SIM_COL_PAX_BOARD_STATE ] = "boarded"
             # UNCHOSEN: paths that are overcap -- nope
-            pathset_links_df.loc[ pathset_links_df[Passenger.PF_COL_ROUTE_ID].notnull() &                               # trip links only
-                                  pathset_links_df[Assignment.SIM_COL_PAX_BUMP_ITER].isnull() &                         # not already bumped
-                                  (pathset_links_df[Assignment.SIM_COL_PAX_CHOSEN]==Assignment.CHOSEN_NOT_CHOSEN_YET)&  # unchosen
-                                  (pathset_links_df[Assignment.SIM_COL_PAX_OVERCAP]>=0),                                # overcap
-                                        Assignment.SIM_COL_PAX_BOARD_STATE ] = "bumped_unchosen"
-            pathset_links_df.loc[ pathset_links_df[Passenger.PF_COL_ROUTE_ID].notnull() &                               # trip links only
-                                  pathset_links_df[Assignment.SIM_COL_PAX_BUMP_ITER].isnull() &                         # not already bumped
-                                  (pathset_links_df[Assignment.SIM_COL_PAX_CHOSEN]==Assignment.CHOSEN_NOT_CHOSEN_YET)&  # unchosen
-                                  (pathset_links_df[Assignment.SIM_COL_PAX_OVERCAP]>=0),                                # overcap
-                                        Assignment.SIM_COL_PAX_BUMP_ITER ] = bump_iter
+            pathset_links_df.loc[ unchosen_overcap, Assignment.SIM_COL_PAX_BOARD_STATE ] = "bumped_unchosen"
+            pathset_links_df.loc[ unchosen_overcap, Assignment.SIM_COL_PAX_BUMP_ITER   ] = bump_iter
 
             # For those trying to board overcap, choose the winners and losers
             # These are trips/stops over capacity
@@ -1887,8 +1901,8 @@ class Assignment(object):
                 bump_stops_df = bump_stops_df.iloc[:1]
 
             FastTripsLogger.info("          Need to bump %d passengers from %d trip-stops" % (bump_stops_df.overcap.sum(), len(bump_stops_df)))
-            # debug -- see the whole trip
-            if True:
+            # debug -- see the whole trip (merges and formats every bumped trip, so only when configured)
+            if Assignment.DEBUG_BUMP_TRIPS:
                 FastTripsLogger.debug("load_passengers_on_vehicles_with_cap() Trips with bump stops:\n%s\n" % \
                     pd.merge(
                         left=veh_loaded_df[vehicle_trip_debug_columns],
@@ -1947,7 +1961,8 @@ class Assignment(object):
                                           "A_id_num":Trip.STOPTIMES_COLUMN_STOP_ID_NUM}, inplace=True)
             # need trip id num
             new_bump_wait = trips.add_numeric_trip_id(new_bump_wait, Trip.STOPTIMES_COLUMN_TRIP_ID, Trip.STOPTIMES_COLUMN_TRIP_ID_NUM)
-            FastTripsLogger.debug("new_bump_wait (%d rows, showing head):\n%s" % (len(new_bump_wait), new_bump_wait.head().to_string()))
+            if FastTripsLogger.isEnabledFor(logging.DEBUG):
+                FastTripsLogger.debug("new_bump_wait (%d rows, showing head):\n%s" % (len(new_bump_wait), new_bump_wait.head().to_string()))
 
              # incorporate it into the bump wait df
             if type(Assignment.bump_wait_df) == type(None):
@@ -1955,8 +1970,9 @@ class Assignment(object):
             else:
                 Assignment.bump_wait_df = pd.concat([Assignment.bump_wait_df, new_bump_wait], axis=0)
 
-                FastTripsLogger.debug("load_passengers_on_vehicles_with_cap() bump_wait_df (%d rows, showing head):\n%s" %
-                    (len(Assignment.bump_wait_df), Assignment.bump_wait_df.head().to_string()))
+                if FastTripsLogger.isEnabledFor(logging.DEBUG):
+                    FastTripsLogger.debug("load_passengers_on_vehicles_with_cap() bump_wait_df (%d rows, showing head):\n%s" %
+                        (len(Assignment.bump_wait_df), Assignment.bump_wait_df.head().to_string()))
 
                 Assignment.bump_wait_df.drop_duplicates(subset=[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM,
                                                                 Trip.STOPTIMES_COLUMN_STOP_SEQUENCE], inplace=True)
@@ -2015,11 +2031,17 @@ class Assignment(object):
             bump_iter += 1
 
         if type(Assignment.bump_wait_df) == pd.DataFrame and len(Assignment.bump_wait_df) > 0:
+            # minutes after midnight, vectorized rather than a python call per row
+            bump_wait_a_time = Assignment.bump_wait_df[Passenger.PF_COL_PAX_A_TIME].dt
             Assignment.bump_wait_df[Passenger.PF_COL_PAX_A_TIME_MIN] = \
-                Assignment.bump_wait_df[Passenger.PF_COL_PAX_A_TIME].map(lambda x: (60.0*x.hour) + x.minute + (x.second/60.0))
+                (60.0*bump_wait_a_time.hour) + bump_wait_a_time.minute + (bump_wait_a_time.second/60.0)
 
-        if type(Assignment.bump_wait_df) == pd.DataFrame and len(Assignment.bump_wait_df) > 0:
-            FastTripsLogger.debug("Bump_wait_df:\n%s" % Assignment.bump_wait_df.to_string())
+        if type(Assignment.bump_wait_df) == pd.DataFrame and len(Assignment.bump_wait_df) > 0 and \
+           FastTripsLogger.isEnabledFor(logging.DEBUG):
+            if Assignment.DEBUG_BUMP_TRIPS:
+                FastTripsLogger.debug("Bump_wait_df:\n%s" % Assignment.bump_wait_df.to_string())
+            else:
+                FastTripsLogger.debug("Bump_wait_df (%d rows, showing head):\n%s" % (len(Assignment.bump_wait_df), Assignment.bump_wait_df.head().to_string()))
 
         return (pathset_paths_df, pathset_links_df, veh_loaded_df)
 
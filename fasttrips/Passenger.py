@@ -619,7 +619,8 @@ class Passenger(object):
         pathlist = []
         linklist = []
 
-        trip_list_id_nums = self.pathfind_trip_list_df[Passenger.TRIP_LIST_COLUMN_TRIP_LIST_ID_NUM].tolist()
+        # set for constant-time membership checks below
+        trip_list_id_nums = set(self.pathfind_trip_list_df[Passenger.TRIP_LIST_COLUMN_TRIP_LIST_ID_NUM].tolist())
 
         for trip_list_id,pathset in self.id_to_pathset.items():
             # only process if we just did pathfinding for this person trip
@@ -628,6 +629,11 @@ class Passenger(object):
             if not pathset.goes_somewhere():   continue
             if not pathset.path_found():       continue
 
+            # these are invariant for all the paths and links in this pathset
+            outbound     = pathset.outbound
+            traced       = (pathset.person_id,pathset.person_trip_id) in Assignment.TRACE_IDS
+            pf_iteration = 0.01*pathfinding_iteration + iteration
+
             for pathnum in range(pathset.num_paths()):
                 # OUTBOUND passengers have states like this:
                 #    stop:          label    departure   dep_mode  successor linktime
@@ -661,23 +667,24 @@ class Passenger(object):
                 prev_linkmode = None
                 prev_state_id = None
 
-                state_list = pathset.pathdict[pathnum][PathSet.PATH_KEY_STATES]
-                if not pathset.outbound: state_list = list(reversed(state_list))
+                path_dict  = pathset.pathdict[pathnum]
+                state_list = path_dict[PathSet.PATH_KEY_STATES]
+                if not outbound: state_list = list(reversed(state_list))
 
                 pathlist.append([\
                     pathset.person_id,
                     pathset.person_trip_id,
                     trip_list_id,
-                    (pathset.person_id,pathset.person_trip_id) in Assignment.TRACE_IDS,
+                    traced,
                     pathset.direction,
                     pathset.mode,
-                    0.01*pathfinding_iteration+iteration,
+                    pf_iteration,
                     pathnum,
-                    pathset.pathdict[pathnum][PathSet.PATH_KEY_COST],
-                    pathset.pathdict[pathnum][PathSet.PATH_KEY_FARE],
-                    pathset.pathdict[pathnum][PathSet.PATH_KEY_PROBABILITY],
-                    pathset.pathdict[pathnum][PathSet.PATH_KEY_INIT_COST],
-                    pathset.pathdict[pathnum][PathSet.PATH_KEY_INIT_FARE]
+                    path_dict[PathSet.PATH_KEY_COST],
+                    path_dict[PathSet.PATH_KEY_FARE],
+                    path_dict[PathSet.PATH_KEY_PROBABILITY],
+                    path_dict[PathSet.PATH_KEY_INIT_COST],
+                    path_dict[PathSet.PATH_KEY_INIT_FARE]
                 ])
 
                 link_num   = 0
@@ -695,7 +702,7 @@ class Passenger(object):
                         trip_id     = state[PathSet.STATE_IDX_TRIP]
                         linkmode    = PathSet.STATE_MODE_TRIP
 
-                    if pathset.outbound:
+                    if outbound:
                         a_id_num    = state_id
                         b_id_num    = state[PathSet.STATE_IDX_SUCCPRED]
                         a_seq       = state[PathSet.STATE_IDX_SEQ]
@@ -725,8 +732,8 @@ class Passenger(object):
                         pathset.person_id,
                         pathset.person_trip_id,
                         trip_list_id,
-                        (pathset.person_id,pathset.person_trip_id) in Assignment.TRACE_IDS,
-                        0.01*pathfinding_iteration + iteration,
+                        traced,
+                        pf_iteration,
                         pathnum,
                         linkmode,
                         mode_num,
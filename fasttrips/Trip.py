@@ -17,6 +17,7 @@ __license__   = """
     limitations under the License.
 """
 import datetime
+import logging
 import os
 
 import numpy as np
@@ -245,8 +246,9 @@ class Trip(object):
             self.vehicles_df[Trip.VEHICLES_COLUMN_MAXIMUM_SPEED_FPS] = \
                 self.vehicles_df[Trip.VEHICLES_COLUMN_MAXIMUM_SPEED]*5280.0/(60.0*60.0)
 
-        FastTripsLogger.debug("=========== VEHICLES ===========\n" + str(self.vehicles_df.head()))
-        FastTripsLogger.debug("\n"+str(self.vehicles_df.index.dtype)+"\n"+str(self.vehicles_df.dtypes))
+        # pass the frames as logging args so they're only rendered if a handler takes debug messages
+        FastTripsLogger.debug("=========== VEHICLES ===========\n%s", self.vehicles_df.head())
+        FastTripsLogger.debug("\n%s\n%s", self.vehicles_df.index.dtype, self.vehicles_df.dtypes)
         FastTripsLogger.info("Read %7d %15s from %25s" %
                              (len(self.vehicles_df), "vehicles", self.INPUT_VEHICLES_FILE))
 
@@ -272,7 +274,7 @@ class Trip(object):
         self.trip_id_df = Util.add_numeric_column(self.trips_df[[Trip.TRIPS_COLUMN_TRIP_ID]],
                                                   id_colname=Trip.TRIPS_COLUMN_TRIP_ID,
                                                   numeric_newcolname=Trip.TRIPS_COLUMN_TRIP_ID_NUM)
-        FastTripsLogger.debug("Trip ID to number correspondence\n" + str(self.trip_id_df.head()))
+        FastTripsLogger.debug("Trip ID to number correspondence\n%s", self.trip_id_df.head())
 
         # prepend_route_id_to_trip_id
         if prepend_route_id_to_trip_id:
@@ -280,7 +282,7 @@ class Trip(object):
             trip_id_df = pd.merge(self.trip_id_df, self.trips_df[[Trip.TRIPS_COLUMN_TRIP_ID, Trip.TRIPS_COLUMN_ROUTE_ID]],
                                       how='left', on=Trip.TRIPS_COLUMN_TRIP_ID)
             trip_id_df.rename(columns={Trip.TRIPS_COLUMN_TRIP_ID: 'trip_id_orig'}, inplace=True)
-            trip_id_df[Trip.TRIPS_COLUMN_TRIP_ID] = trip_id_df[Trip.TRIPS_COLUMN_ROUTE_ID].map(str) + str("_") + trip_id_df['trip_id_orig']
+            trip_id_df[Trip.TRIPS_COLUMN_TRIP_ID] = trip_id_df[Trip.TRIPS_COLUMN_ROUTE_ID].astype(str) + str("_") + trip_id_df['trip_id_orig']
         else:
             trip_id_df = self.trip_id_df
 
@@ -289,14 +291,16 @@ class Trip(object):
                                sep=" ", index=False)
         FastTripsLogger.debug("Wrote %s" % os.path.join(output_dir, Trip.OUTPUT_TRIP_ID_NUM_FILE))
 
-        self.trips_df = pd.merge(left=self.trips_df, right=self.trip_id_df, on=Trip.TRIPS_COLUMN_TRIP_ID, how='left')
+        # trip_id_df is one row per trip id, so this is a lookup rather than a merge copying all of trips_df
+        self.trips_df[Trip.TRIPS_COLUMN_TRIP_ID_NUM] = self.trips_df[Trip.TRIPS_COLUMN_TRIP_ID].map(
+            self.trip_id_df.set_index(Trip.TRIPS_COLUMN_TRIP_ID)[Trip.TRIPS_COLUMN_TRIP_ID_NUM])
 
         # Merge vehicles
         self.trips_df = pd.merge(left=self.trips_df, right=self.vehicles_df, how='left',
                                      left_on=Trip.TRIPS_COLUMN_VEHICLE_NAME, right_on=Trip.VEHICLES_COLUMN_VEHICLE_NAME)
 
-        FastTripsLogger.debug("=========== TRIPS ===========\n" + str(self.trips_df.head()))
-        FastTripsLogger.debug("\n"+str(self.trips_df.index.dtype)+"\n"+str(self.trips_df.dtypes))
+        FastTripsLogger.debug("=========== TRIPS ===========\n%s", self.trips_df.head())
+        FastTripsLogger.debug("\n%s\n%s", self.trips_df.index.dtype, self.trips_df.dtypes)
         FastTripsLogger.info("Read %7d %15s from %25s, %25s" %
                              (len(self.trips_df), "trips", "trips.txt", self.INPUT_TRIPS_FILE))
 
@@ -304,8 +308,8 @@ class Trip(object):
         self.trips_df = pd.merge(left=self.trips_df, right=routes.routes_df,
                                      how='left',
                                      on=Trip.TRIPS_COLUMN_ROUTE_ID)
-        FastTripsLogger.debug("Final (%d)\n%s" % (len(self.trips_df), str(self.trips_df.head())))
-        FastTripsLogger.debug("\n"+str(self.trips_df.dtypes))
+        FastTripsLogger.debug("Final (%d)\n%s", len(self.trips_df), self.trips_df.head())
+        FastTripsLogger.debug("\n%s", self.trips_df.dtypes)
 
         self.stop_times_df = gtfs_feed.stop_times
 
@@ -313,21 +317,28 @@ class Trip(object):
         stop_times_ft_df = gtfs_feed.get(Trip.INPUT_STOPTIMES_FILE)
         if not stop_times_ft_df.empty:
             # verify required columns are present
-            stop_times_ft_cols = list(stop_times_ft_df)
             assert({Trip.STOPTIMES_COLUMN_TRIP_ID, Trip.STOPTIMES_COLUMN_STOP_ID}.issubset(stop_times_ft_df))
 
-            # Join to the trips dataframe
+            # Join to the stop times dataframe, indexing the supplemental side on the key rather than merging
             if len(stop_times_ft_df.columns) > 2:
-                self.stop_times_df = pd.merge(left=self.stop_times_df, right=stop_times_ft_df,
-                                                  how='left',
-                                                  on=[Trip.STOPTIMES_COLUMN_TRIP_ID,
-                                                      Trip.STOPTIMES_COLUMN_STOP_ID])
+                self.stop_times_df = self.stop_times_df.join(
+                    stop_times_ft_df.set_index([Trip.STOPTIMES_COLUMN_TRIP_ID, Trip.STOPTIMES_COLUMN_STOP_ID]),
+                    on=[Trip.STOPTIMES_COLUMN_TRIP_ID, Trip.STOPTIMES_COLUMN_STOP_ID], how='left')
 
-        FastTripsLogger.debug("=========== STOP TIMES ===========\n" + str(self.stop_times_df.head()))
-        FastTripsLogger.debug("\n"+str(self.stop_times_df.index.dtype)+"\n"+str(self.stop_times_df.dtypes))
+        FastTripsLogger.debug("=========== STOP TIMES ===========\n%s", self.stop_times_df.head())
+        FastTripsLogger.debug("\n%s\n%s", self.stop_times_df.index.dtype, self.stop_times_df.dtypes)
 
         self.add_shape_dist_traveled(stops)
 
+        # datetime version, converted column-wise from the seconds after midnight of the network build date
+        # (anchored like Util.parse_minutes_to_time, but without a python call per row)
+        from .Assignment import Assignment
+        build_date_midnight = datetime.datetime.combine(Assignment.NETWORK_BUILD_DATE, datetime.time())
+        arrival_time   = build_date_midnight + \
+            pd.to_timedelta(self.stop_times_df[Trip.STOPTIMES_COLUMN_ARRIVAL_TIME], unit='s')
+        departure_time = build_date_midnight + \
+            pd.to_timedelta(self.stop_times_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME], unit='s')
+
         self.stop_times_df[Trip.STOPTIMES_COLUMN_ARRIVAL_TIME] = self.stop_times_df[Trip.STOPTIMES_COLUMN_ARRIVAL_TIME]/ 60
         self.stop_times_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME] = self.stop_times_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME]/ 60
         self.stop_times_df.rename(columns={
@@ -335,11 +346,8 @@ class Trip(object):
             Trip.STOPTIMES_COLUMN_DEPARTURE_TIME: Trip.STOPTIMES_COLUMN_DEPARTURE_TIME_MIN,
         }, inplace=True)
 
-        # datetime version
-        self.stop_times_df[Trip.STOPTIMES_COLUMN_ARRIVAL_TIME] = \
-            self.stop_times_df[Trip.STOPTIMES_COLUMN_ARRIVAL_TIME_MIN].map(lambda x: Util.parse_minutes_to_time(x))
-        self.stop_times_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME] = \
-            self.stop_times_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME_MIN].map(lambda x: Util.parse_minutes_to_time(x))
+        self.stop_times_df[Trip.STOPTIMES_COLUMN_ARRIVAL_TIME  ] = arrival_time
+        self.stop_times_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME] = departure_time
 
         # Add numeric stop and trip ids
         self.stop_times_df = stops.add_numeric_stop_id(self.stop_times_df,
@@ -349,6 +357,12 @@ class Trip(object):
                                                       id_colname=Trip.STOPTIMES_COLUMN_TRIP_ID,
                                                       numeric_newcolname=Trip.STOPTIMES_COLUMN_TRIP_ID_NUM)
 
+        # stop times is the big one; the ids fit in 32 bits so halve what later merges/sorts have to move
+        # (stop_sequence stays int64 since it becomes the trip-level max_stop_seq)
+        for int_col in [Trip.STOPTIMES_COLUMN_TRIP_ID_NUM, Trip.STOPTIMES_COLUMN_STOP_ID_NUM]:
+            if self.stop_times_df[int_col].abs().max() <= np.iinfo(np.int32).max:
+                self.stop_times_df[int_col] = self.stop_times_df[int_col].astype(np.int32)
+
         self.stop_times_df = Util.remove_null_columns(self.stop_times_df)
 
         self.add_original_travel_time_and_dwell()
@@ -415,36 +429,35 @@ class Trip(object):
         Also adds dwell time columns named :py:attr:`Trip.STOPTIMES_COLUMN_DWELL_TIME`
         and :py:attr:`Trip.STOPTIMES_COLUMN_DWELL_TIME_SEC`
         """
-        stop_times_len_df = len(self.stop_times_df)
         # first, find the original travel time following each stop
-        # need to join the next stop and it's arrival time
-        next_stop_df = self.stop_times_df[[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM,
+        # sort by trip and sequence so the next stop is the next row; shift instead of merging a decremented copy back
+        stop_times   = self.stop_times_df[[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM,
                                            Trip.STOPTIMES_COLUMN_STOP_SEQUENCE,
-                                           Trip.STOPTIMES_COLUMN_ARRIVAL_TIME]].copy()
-        next_stop_df.loc[:,Trip.STOPTIMES_COLUMN_STOP_SEQUENCE] = next_stop_df[Trip.STOPTIMES_COLUMN_STOP_SEQUENCE]-1
-        next_stop_df.rename(columns={Trip.STOPTIMES_COLUMN_ARRIVAL_TIME:"next_stop_arrival"}, inplace=True)
-
-        FastTripsLogger.debug("next stop arrival:\n%s\n" % next_stop_df.head().to_string())
+                                           Trip.STOPTIMES_COLUMN_ARRIVAL_TIME]].sort_values(by=[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM,
+                                                                                                 Trip.STOPTIMES_COLUMN_STOP_SEQUENCE])
+        next_stop_df = stop_times.shift(-1)
+        # only the stop at sequence+1 of the same trip counts, as with the merge
+        is_next_stop = (next_stop_df[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM  ] == stop_times[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM]) & \
+                       (next_stop_df[Trip.STOPTIMES_COLUMN_STOP_SEQUENCE] == stop_times[Trip.STOPTIMES_COLUMN_STOP_SEQUENCE]+1)
+        next_stop_arrival = next_stop_df[Trip.STOPTIMES_COLUMN_ARRIVAL_TIME].where(is_next_stop)
 
-        self.stop_times_df = pd.merge(left=self.stop_times_df, right=next_stop_df, how='left')
-        assert(stop_times_len_df == len(self.stop_times_df))
+        FastTripsLogger.debug("next stop arrival:\n%s\n" % next_stop_arrival.head().to_string())
 
         # this will be NaT for last stops
         self.stop_times_df[Trip.STOPTIMES_COLUMN_ORIGINAL_TRAVEL_TIME] = \
-            self.stop_times_df["next_stop_arrival"] - self.stop_times_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME]
-        # drop the extra column
-        self.stop_times_df.drop(["next_stop_arrival"], axis=1, inplace=True)
+            next_stop_arrival - self.stop_times_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME]
 
         # copy
         self.stop_times_df[Trip.STOPTIMES_COLUMN_TRAVEL_TIME    ] = self.stop_times_df[Trip.STOPTIMES_COLUMN_ORIGINAL_TRAVEL_TIME]
+        # seconds straight from the timedelta64 array; NaT (last stops) divides to NaN
         self.stop_times_df[Trip.STOPTIMES_COLUMN_TRAVEL_TIME_SEC] = \
-            (self.stop_times_df[Trip.STOPTIMES_COLUMN_ORIGINAL_TRAVEL_TIME]/np.timedelta64(1, 's'))
+            self.stop_times_df[Trip.STOPTIMES_COLUMN_ORIGINAL_TRAVEL_TIME].values / np.timedelta64(1, 's')
 
         # dwell time
         self.stop_times_df[Trip.STOPTIMES_COLUMN_DWELL_TIME] = \
             self.stop_times_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME] - self.stop_times_df[Trip.STOPTIMES_COLUMN_ARRIVAL_TIME]
         self.stop_times_df[Trip.STOPTIMES_COLUMN_DWELL_TIME_SEC] = \
-            (self.stop_times_df[Trip.STOPTIMES_COLUMN_DWELL_TIME]/np.timedelta64(1, 's'))
+            self.stop_times_df[Trip.STOPTIMES_COLUMN_DWELL_TIME].values / np.timedelta64(1, 's')
 
     def add_trip_attrs_from_stoptimes(self):
         """
@@ -455,13 +468,13 @@ class Trip(object):
 
         stops_by_trip = self.stop_times_df.groupby(Trip.STOPTIMES_COLUMN_TRIP_ID_NUM).agg(
                             {Trip.STOPTIMES_COLUMN_STOP_SEQUENCE :'max',
-                             Trip.STOPTIMES_COLUMN_DEPARTURE_TIME:'min'}).reset_index()
+                             Trip.STOPTIMES_COLUMN_DEPARTURE_TIME:'min'})
         # rename it to max_stop_seq
         stops_by_trip.rename(columns={Trip.STOPTIMES_COLUMN_STOP_SEQUENCE :Trip.TRIPS_COLUMN_MAX_STOP_SEQUENCE,
                                       Trip.STOPTIMES_COLUMN_DEPARTURE_TIME:Trip.TRIPS_COLUMN_TRIP_DEPARTURE_TIME}, inplace=True)
 
-        # add it to trips
-        self.trips_df = pd.merge(left=self.trips_df, right=stops_by_trip)
+        # add it to trips -- the aggregate is already indexed by trip_id_num so join on that
+        self.trips_df = self.trips_df.join(stops_by_trip, on=Trip.TRIPS_COLUMN_TRIP_ID_NUM, how='inner')
         # make sure we didn't change the length
         assert(trips_len == len(self.trips_df))
 
@@ -526,14 +539,14 @@ class Trip(object):
         # incorporate it
         self.stop_times_df.loc[ (self.stop_times_df["null_shape_dist_traveled_bool"]), Trip.STOPTIMES_COLUMN_SHAPE_DIST_TRAVELED] = self.stop_times_df["calc shape_dist_traveled"]
 
-        FastTripsLogger.debug("add_shape_dist_traveled() stop_times_df\n%s" % str(self.stop_times_df.head()))
+        FastTripsLogger.debug("add_shape_dist_traveled() stop_times_df\n%s", self.stop_times_df.head())
 
         # drop the temp fields
         self.stop_times_df.drop(["null_shape_dist_traveled_bool",
                                  "stop_lat", "stop_lon",
                                  "stop_seq_prev", "stop_sequence_prev",
                                  "stop_lat_prev", "stop_lon_prev", "calc shape_dist_traveled"], axis=1, inplace=True)
-        FastTripsLogger.debug("add_shape_dist_traveled() stop_times_df\n%s" % str(self.stop_times_df.head()))
+        FastTripsLogger.debug("add_shape_dist_traveled() stop_times_df\n%s", self.stop_times_df.head())
 
     def get_full_trips(self):
         """
@@ -568,8 +581,6 @@ class Trip(object):
         This writes to an intermediate file a formatted file for the C++ extension.
         Since there are strings involved, it's easier than passing it to the extension.
         """
-        trips_df = self.trips_df.copy()
-
         # drop some of the attributes
         drop_fields = [Trip.TRIPS_COLUMN_TRIP_ID,             # use numerical version
                        Trip.TRIPS_COLUMN_ROUTE_ID,            # use numerical version
@@ -587,18 +598,14 @@ class Trip(object):
                        Route.FARE_ATTR_COLUMN_FARE_PERIOD,    # text
                        Route.ROUTES_COLUMN_PROOF_OF_PAYMENT,  # text
                        ]
-        # we can only drop fields that are in the dataframe
-        trip_fields = list(trips_df.columns.values)
-        valid_drop_fields = []
-        for field in drop_fields:
-            if field in trip_fields: valid_drop_fields.append(field)
-
-        trips_df.drop(valid_drop_fields, axis=1, inplace=True)
+        # select what we keep rather than copying everything and dropping
+        drop_fields = set(drop_fields)
+        trips_df = self.trips_df[[col for col in self.trips_df.columns if col not in drop_fields]]
 
         # only pass on numeric columns -- for now, drop the rest
-        FastTripsLogger.debug("Dropping non-numeric trip info\n" + str(trips_df.head()))
+        FastTripsLogger.debug("Dropping non-numeric trip info\n%s", trips_df.head())
         trips_df = trips_df.select_dtypes(exclude=['object'])
-        FastTripsLogger.debug("\n"+str(trips_df.head()))
+        FastTripsLogger.debug("\n%s", trips_df.head())
 
         # the index is the trip_id_num
         trips_df.set_index(Trip.TRIPS_COLUMN_TRIP_ID_NUM, inplace=True)
@@ -655,180 +662,173 @@ class Trip(object):
         trips_df_len = len(trips_df)
         FastTripsLogger.debug("Trip.update_trip_times() trips_df has %d rows" % len(trips_df))
         # FastTripsLogger.debug("trips_df.dtypes=\n%s\n" % str(trips_df.dtypes))
-        trip_cols = list(trips_df.columns.values)
-
-        # Default to 0
-        trips_df[Trip.SIM_COL_VEH_FRICTION    ] = 0.0
-        trips_df[Trip.SIM_COL_VEH_MSA_FRICTION] = 0.0
+        trip_cols = trips_df.columns
 
         if Trip.VEHICLES_COLUMN_SEATED_CAPACITY in trip_cols:
 
+            # read the columns once
+            seated_capacity     = trips_df[Trip.VEHICLES_COLUMN_SEATED_CAPACITY]
+            has_seated_capacity = pd.notnull(seated_capacity)
+
             # log null seated capacities
-            if pd.isnull(trips_df[Trip.VEHICLES_COLUMN_SEATED_CAPACITY]).sum() > 0:
+            if not has_seated_capacity.all():
                 FastTripsLogger.warn("Trip.update_trip_times(): some [%s] not configured; assuming zero friction for those vehicles" % Trip.VEHICLES_COLUMN_SEATED_CAPACITY)
-                FastTripsLogger.warn("\n%s" % trips_df[[Trip.VEHICLES_COLUMN_VEHICLE_NAME, Trip.VEHICLES_COLUMN_SEATED_CAPACITY]].loc[pd.isnull(trips_df[Trip.VEHICLES_COLUMN_SEATED_CAPACITY])].drop_duplicates())
-
-            # set standeeds
-            trips_df[Trip.SIM_COL_VEH_STANDEES    ] = trips_df[Trip.SIM_COL_VEH_ONBOARD    ] - trips_df[Trip.VEHICLES_COLUMN_SEATED_CAPACITY]
-            trips_df[Trip.SIM_COL_VEH_MSA_STANDEES] = trips_df[Trip.SIM_COL_VEH_MSA_ONBOARD] - trips_df[Trip.VEHICLES_COLUMN_SEATED_CAPACITY]
-            # it can only be non-negative
-            trips_df.loc[trips_df[Trip.SIM_COL_VEH_STANDEES    ]<0, Trip.SIM_COL_VEH_STANDEES    ] = 0
-            trips_df.loc[trips_df[Trip.SIM_COL_VEH_MSA_STANDEES]<0, Trip.SIM_COL_VEH_MSA_STANDEES] = 0
+                FastTripsLogger.warn("\n%s" % trips_df[[Trip.VEHICLES_COLUMN_VEHICLE_NAME, Trip.VEHICLES_COLUMN_SEATED_CAPACITY]].loc[~has_seated_capacity].drop_duplicates())
+
+            # set standeeds -- it can only be non-negative
+            standees     = (trips_df[Trip.SIM_COL_VEH_ONBOARD    ] - seated_capacity).clip(lower=0)
+            msa_standees = (trips_df[Trip.SIM_COL_VEH_MSA_ONBOARD] - seated_capacity).clip(lower=0)
+            trips_df[Trip.SIM_COL_VEH_STANDEES    ] = standees
+            trips_df[Trip.SIM_COL_VEH_MSA_STANDEES] = msa_standees
             # where it is positive, friction = on+off+standees
-            trips_df.loc[(trips_df[Trip.SIM_COL_VEH_STANDEES    ]>0)&(pd.notnull(trips_df[Trip.VEHICLES_COLUMN_SEATED_CAPACITY])), Trip.SIM_COL_VEH_FRICTION    ] = \
-                trips_df[Trip.SIM_COL_VEH_BOARDS    ] + trips_df[Trip.SIM_COL_VEH_ALIGHTS    ] + trips_df[Trip.SIM_COL_VEH_STANDEES    ]
-            trips_df.loc[(trips_df[Trip.SIM_COL_VEH_MSA_STANDEES]>0)&(pd.notnull(trips_df[Trip.VEHICLES_COLUMN_SEATED_CAPACITY])), Trip.SIM_COL_VEH_MSA_FRICTION] = \
-                trips_df[Trip.SIM_COL_VEH_MSA_BOARDS] + trips_df[Trip.SIM_COL_VEH_MSA_ALIGHTS] + trips_df[Trip.SIM_COL_VEH_MSA_STANDEES]
+            trips_df[Trip.SIM_COL_VEH_FRICTION    ] = np.where((standees    >0)&has_seated_capacity,
+                trips_df[Trip.SIM_COL_VEH_BOARDS    ] + trips_df[Trip.SIM_COL_VEH_ALIGHTS    ] + standees,     0.0)
+            trips_df[Trip.SIM_COL_VEH_MSA_FRICTION] = np.where((msa_standees>0)&has_seated_capacity,
+                trips_df[Trip.SIM_COL_VEH_MSA_BOARDS] + trips_df[Trip.SIM_COL_VEH_MSA_ALIGHTS] + msa_standees, 0.0)
         else:
             # log no seated capacities at all
             FastTripsLogger.warn("Trip.update_trip_times(): Cannot calculate friction because [%s] not configured" % Trip.VEHICLES_COLUMN_SEATED_CAPACITY)
+            # Default to 0
+            trips_df[Trip.SIM_COL_VEH_FRICTION    ] = 0.0
+            trips_df[Trip.SIM_COL_VEH_MSA_FRICTION] = 0.0
 
         # Update the dwell time
         if Trip.VEHICLES_COLUMN_DWELL_FORMULA in trip_cols:
-            all_dwell_df   = None
-            all_dwell_init = False
-            # grouppy unique dwell time forumulas
-            dwell_groups = trips_df.groupby(Trip.VEHICLES_COLUMN_DWELL_FORMULA)
-            for dwell_formula, dwell_group in dwell_groups:
-
-                dwell_df = dwell_group.copy()
-                FastTripsLogger.debug("dwell_formula %s has %d rows" % (str(dwell_formula), len(dwell_df)))
-                if isinstance(dwell_formula,str):
-                    if MSA_RESULTS:
-                        # replace [boards], [alights], etc with trip_df['msa_boards'], trip_df['msa_alights'], etc
-                        dwell_formula = dwell_formula.replace("[","dwell_df['msa_")
-                    else:
-                        # replace [boards], [alights], etc with trip_df['boards'], trip_df['alights'], etc
-                        dwell_formula = dwell_formula.replace("[","dwell_df['")
-                    dwell_formula = dwell_formula.replace("]","']")
-
-                    # eval it
-                    dwell_df[Trip.STOPTIMES_COLUMN_DWELL_TIME_SEC] = eval(dwell_formula)
-                else:
-                    dwell_df[Trip.STOPTIMES_COLUMN_DWELL_TIME_SEC] = 0.0
-
-                # FastTripsLogger.debug("\n%s" % dwell_df[["boards","alights","dwell_formula","dwell_time_sec"]].to_string())
-                if all_dwell_init:
-                    all_dwell_df = pd.concat([all_dwell_df, dwell_df], axis=0)
+            # evaluate each unique dwell time formula once over the whole frame and keep it for its rows
+            # factorize so each formula's rows are found by comparing int codes, not formula strings
+            formula_codes, dwell_formulas = pd.factorize(trips_df[Trip.VEHICLES_COLUMN_DWELL_FORMULA])
+            formula_dwells = []
+            for formula_code, dwell_formula in enumerate(dwell_formulas):
+
+                formula_rows = formula_codes == formula_code
+                FastTripsLogger.debug("dwell_formula %s has %d rows" % (str(dwell_formula), formula_rows.sum()))
+                if not isinstance(dwell_formula,str):
+                    formula_dwells.append( (formula_rows, 0.0) )
+                    continue
+
+                if MSA_RESULTS:
+                    # replace [boards], [alights], etc with msa_boards, msa_alights, etc
+                    dwell_expr = dwell_formula.replace("[","msa_")
                 else:
-                    all_dwell_df = dwell_df
-                    all_dwell_init = True
-
-            # use the new one
-            trips_df = all_dwell_df
+                    # replace [boards], [alights], etc with boards, alights, etc
+                    dwell_expr = dwell_formula.replace("[","")
+                dwell_expr = dwell_expr.replace("]","")
+
+                # eval it; a constant formula evaluates to a scalar, which np.where broadcasts
+                formula_dwells.append( (formula_rows, trips_df.eval(dwell_expr)) )
+
+            # preallocate with the type the formulas evaluate to (integer formulas give integer dwell times),
+            # same as concatenating the per-formula results would
+            dwell_dtype = np.result_type(*[np.asarray(dwell).dtype for formula_rows, dwell in formula_dwells]) \
+                          if len(formula_dwells) > 0 else np.float64
+            dwell_time_sec = np.zeros(len(trips_df), dtype=dwell_dtype)
+            for formula_rows, dwell in formula_dwells:
+                dwell_time_sec = np.where(formula_rows, dwell, dwell_time_sec)
+            trips_df[Trip.STOPTIMES_COLUMN_DWELL_TIME_SEC] = dwell_time_sec
 
             # keep the dwell time
-            trips_df[Trip.STOPTIMES_COLUMN_DWELL_TIME] = trips_df[Trip.STOPTIMES_COLUMN_DWELL_TIME_SEC].map(lambda x: datetime.timedelta(seconds=x))
+            trips_df[Trip.STOPTIMES_COLUMN_DWELL_TIME] = pd.to_timedelta(trips_df[Trip.STOPTIMES_COLUMN_DWELL_TIME_SEC], unit='s')
 
         # the vehicle stops if someone boards or someone alights or both
         trips_df["does_stop"] = (trips_df[Trip.SIM_COL_VEH_BOARDS]>0) | (trips_df[Trip.SIM_COL_VEH_ALIGHTS]>0)
 
         # we need information about the next stop
+        # sort by trip and sequence so the next stop is the next row; shift instead of merging a decremented copy back
+        trips_df = trips_df.sort_values(by=[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM, Trip.STOPTIMES_COLUMN_STOP_SEQUENCE]).reset_index(drop=True)
         next_stop_df = trips_df[[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM,
                                  Trip.STOPTIMES_COLUMN_STOP_SEQUENCE,
-                                 Trip.TRIPS_COLUMN_MAX_STOP_SEQUENCE,
-                                 "does_stop"]].copy()
-        next_stop_df.loc[:,"is_last_stop"] = next_stop_df[Trip.STOPTIMES_COLUMN_STOP_SEQUENCE] == next_stop_df[Trip.TRIPS_COLUMN_MAX_STOP_SEQUENCE]
-        next_stop_df.loc[:,Trip.STOPTIMES_COLUMN_STOP_SEQUENCE] = next_stop_df[Trip.STOPTIMES_COLUMN_STOP_SEQUENCE]-1
-        next_stop_df.rename(columns={"does_stop"                       :"next_does_stop",
-                                     "is_last_stop"                    :"next_is_last_stop"}, inplace=True)
-        FastTripsLogger.debug("next_stop_df:\n%s\n" % next_stop_df.head().to_string())
-
-        trips_df = pd.merge(left=trips_df, right=next_stop_df, how='left')
-        assert(trips_df_len==len(trips_df))
+                                 "does_stop"]].shift(-1)
+        # only the stop at sequence+1 of the same trip counts, as with the merge
+        is_next_stop = (next_stop_df[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM  ] == trips_df[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM]) & \
+                       (next_stop_df[Trip.STOPTIMES_COLUMN_STOP_SEQUENCE] == trips_df[Trip.STOPTIMES_COLUMN_STOP_SEQUENCE]+1)
+        trips_df["next_does_stop"   ] = next_stop_df["does_stop"].where(is_next_stop)
+        trips_df["next_is_last_stop"] = (next_stop_df[Trip.STOPTIMES_COLUMN_STOP_SEQUENCE] == trips_df[Trip.TRIPS_COLUMN_MAX_STOP_SEQUENCE]).where(is_next_stop)
 
         # Start with original travel time for the link FROM this stop to the NEXT stop
-        trip_cols = list(trips_df.columns.values)
+        trip_cols = trips_df.columns
 
         # Add acceleration from stop if there are boards/alights
         # Skip first stop because we assume it's already there, and last since we don't go anywhere
         trips_df["accel_secs"] = 0.0
         if (Trip.VEHICLES_COLUMN_MAXIMUM_SPEED_FPS in trip_cols) and \
            (Trip.VEHICLES_COLUMN_ACCELERATION in trip_cols):
-            trips_df.loc[trips_df["does_stop"] & \
-                         (trips_df[Trip.VEHICLES_COLUMN_ACCELERATION] > 0) &
-                         (trips_df[Trip.STOPTIMES_COLUMN_STOP_SEQUENCE]>1) & \
-                         (trips_df[Trip.STOPTIMES_COLUMN_STOP_SEQUENCE]<trips_df[Trip.TRIPS_COLUMN_MAX_STOP_SEQUENCE]), "accel_secs"] = \
-                         trips_df[Trip.VEHICLES_COLUMN_MAXIMUM_SPEED_FPS]/trips_df[Trip.VEHICLES_COLUMN_ACCELERATION]
+            # Series compare/divide so null or zero rates don't warn; np.where writes the column in one go
+            stop_sequence = trips_df[Trip.STOPTIMES_COLUMN_STOP_SEQUENCE]
+            acceleration  = trips_df[Trip.VEHICLES_COLUMN_ACCELERATION]
+            trips_df["accel_secs"] = np.where(trips_df["does_stop"] & (acceleration > 0) & \
+                                              (stop_sequence > 1) & \
+                                              (stop_sequence < trips_df[Trip.TRIPS_COLUMN_MAX_STOP_SEQUENCE]),
+                                              trips_df[Trip.VEHICLES_COLUMN_MAXIMUM_SPEED_FPS]/acceleration, 0.0)
         # Add deceleration to next stop.
         # Skip stop with next stop = last stop because we assume it's already there
         trips_df["decel_secs"] = 0.0
         if (Trip.VEHICLES_COLUMN_MAXIMUM_SPEED_FPS in trip_cols) and \
            (Trip.VEHICLES_COLUMN_DECELERATION in trip_cols):
-            trips_df.loc[(trips_df["next_does_stop"]) & \
-                         (trips_df[Trip.VEHICLES_COLUMN_DECELERATION] > 0) &
-                         (trips_df["next_is_last_stop"]==False), "decel_secs"] = \
-                          trips_df[Trip.VEHICLES_COLUMN_MAXIMUM_SPEED_FPS]/trips_df[Trip.VEHICLES_COLUMN_DECELERATION]
+            deceleration  = trips_df[Trip.VEHICLES_COLUMN_DECELERATION]
+            trips_df["decel_secs"] = np.where((trips_df["next_does_stop"] == True) & (deceleration > 0) & \
+                                              (trips_df["next_is_last_stop"] == False),
+                                              trips_df[Trip.VEHICLES_COLUMN_MAXIMUM_SPEED_FPS]/deceleration, 0.0)
 
         # update the travel time
-        trips_df[Trip.STOPTIMES_COLUMN_TRAVEL_TIME_SEC] = trips_df[Trip.STOPTIMES_COLUMN_ORIGINAL_TRAVEL_TIME]/np.timedelta64(1, 's')
+        # seconds straight from the timedelta64 array; NaT (last stops) divides to NaN
+        trips_df[Trip.STOPTIMES_COLUMN_TRAVEL_TIME_SEC] = \
+            trips_df[Trip.STOPTIMES_COLUMN_ORIGINAL_TRAVEL_TIME].values / np.timedelta64(1, 's')
         trips_df.loc[ pd.notnull(trips_df["accel_secs"]), Trip.STOPTIMES_COLUMN_TRAVEL_TIME_SEC] = trips_df[Trip.STOPTIMES_COLUMN_TRAVEL_TIME_SEC] + trips_df["accel_secs"]
         trips_df.loc[ pd.notnull(trips_df["decel_secs"]), Trip.STOPTIMES_COLUMN_TRAVEL_TIME_SEC] = trips_df[Trip.STOPTIMES_COLUMN_TRAVEL_TIME_SEC] + trips_df["decel_secs"]
 
-        trips_df[Trip.STOPTIMES_COLUMN_TRAVEL_TIME    ] = trips_df[Trip.STOPTIMES_COLUMN_TRAVEL_TIME_SEC].map(lambda x: datetime.timedelta(seconds=x))
+        trips_df[Trip.STOPTIMES_COLUMN_TRAVEL_TIME    ] = pd.to_timedelta(trips_df[Trip.STOPTIMES_COLUMN_TRAVEL_TIME_SEC], unit='s')
 
         # put travel time + dwell together because that's the full time for a link (stop arrival time to next stop arrival time)
         trips_df["travel_dwell_sec"] = trips_df[Trip.STOPTIMES_COLUMN_TRAVEL_TIME_SEC] + trips_df[Trip.STOPTIMES_COLUMN_DWELL_TIME_SEC]
         # cumulatively sum it to get arrival times times for the trip
-        trips_df["travel_dwell_sec_cum"] = trips_df.groupby([Trip.STOPTIMES_COLUMN_TRIP_ID_NUM])["travel_dwell_sec"].cumsum()
-        trips_df["travel_dwell_cum"    ] = trips_df["travel_dwell_sec_cum"].map(lambda x: datetime.timedelta(seconds=x) if pd.notnull(x) else None)
+        # still sorted by trip, so take one running sum and restart it at each trip's first row
+        trips_df["travel_dwell_sec_cum"] = Util.cumsum_by_sorted_group(trips_df["travel_dwell_sec"].values,
+                                                                       trips_df[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM].values)
+        # nulls come through as NaT
+        trips_df["travel_dwell_cum"    ] = pd.to_timedelta(trips_df["travel_dwell_sec_cum"], unit='s')
         # verifying cumsum did as expected
         # FastTripsLogger.debug("\n"+ trips_df[[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM, Trip.STOPTIMES_COLUMN_STOP_SEQUENCE, "travel_dwell_sec","travel_dwell_sec_cum"]].to_string())
 
-        # move the next arrival time for joining to the next stop
-        next_stop_df = trips_df[[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM,
-                                 Trip.STOPTIMES_COLUMN_STOP_SEQUENCE,
-                                 Trip.TRIPS_COLUMN_TRIP_DEPARTURE_TIME,
-                                 "travel_dwell_cum"]].copy()
         # need to start from trip arrival time.  For some reason can't aggregate STOPTIMES_COLUMN_DWELL_TIME, only the seconds version
-        first_dwell_df = trips_df[[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM,Trip.STOPTIMES_COLUMN_DWELL_TIME_SEC]]. \
-            groupby([Trip.STOPTIMES_COLUMN_TRIP_ID_NUM]).agg({Trip.STOPTIMES_COLUMN_DWELL_TIME_SEC:'first'}).reset_index()
-        first_dwell_df.rename(columns={Trip.STOPTIMES_COLUMN_DWELL_TIME_SEC:"trip_first_dwell_sec"}, inplace=True)
-        first_dwell_df["trip_first_dwell"] = first_dwell_df["trip_first_dwell_sec"].map(lambda x: datetime.timedelta(seconds=x))
-
-        # verify first dwell is correct
-        # FastTripsLogger.debug("first_dwell:\n%s\n" % first_dwell_df.head().to_string())
-        next_stop_df = pd.merge(left=next_stop_df, right=first_dwell_df, how='left')
-
-        FastTripsLogger.debug("next_stop_df:\n%s\n" % next_stop_df.head().to_string())
-
-        next_stop_df["trip_arrival_time" ] = next_stop_df[Trip.TRIPS_COLUMN_TRIP_DEPARTURE_TIME] - next_stop_df["trip_first_dwell"]
-        next_stop_df["new_arrival_time"  ] = next_stop_df["trip_arrival_time"] + trips_df["travel_dwell_cum"]
-        next_stop_df.loc[:,Trip.STOPTIMES_COLUMN_STOP_SEQUENCE] += 1
-
-        FastTripsLogger.debug("next_stop_df:\n%s\n" % next_stop_df.head().to_string())
-        trips_df = pd.merge(left=trips_df,
-                                right=next_stop_df[[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM,
-                                                    Trip.STOPTIMES_COLUMN_STOP_SEQUENCE,
-                                                    "new_arrival_time"]],
-                                how="left")
-        # the first ones will be NaT but that's perfect -- we don't want to set those anyway
-        trips_df.loc[pd.notnull(trips_df["new_arrival_time"]),Trip.STOPTIMES_COLUMN_ARRIVAL_TIME] = trips_df["new_arrival_time"]
-        # set the first ones to be departure time minus dwell time
-        trips_df.loc[pd.isnull( trips_df["new_arrival_time"]),Trip.STOPTIMES_COLUMN_ARRIVAL_TIME] = trips_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME] - trips_df[Trip.STOPTIMES_COLUMN_DWELL_TIME]
+        trip_first_dwell  = pd.to_timedelta(trips_df.groupby(Trip.STOPTIMES_COLUMN_TRIP_ID_NUM)[Trip.STOPTIMES_COLUMN_DWELL_TIME_SEC].transform('first'), unit='s')
+        trip_arrival_time = trips_df[Trip.TRIPS_COLUMN_TRIP_DEPARTURE_TIME] - trip_first_dwell
+
+        # the new arrival time comes from the previous stop's cumulative travel + dwell; still sorted so that's the previous row
+        prev_stop_df = trips_df[[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM,
+                                 Trip.STOPTIMES_COLUMN_STOP_SEQUENCE,
+                                 "travel_dwell_cum"]].shift(1)
+        is_prev_stop = (prev_stop_df[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM  ] == trips_df[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM]) & \
+                       (prev_stop_df[Trip.STOPTIMES_COLUMN_STOP_SEQUENCE] == trips_df[Trip.STOPTIMES_COLUMN_STOP_SEQUENCE]-1)
+        trips_df["new_arrival_time"] = (trip_arrival_time + prev_stop_df["travel_dwell_cum"]).where(is_prev_stop)
+
+        # the first ones will be NaT -- set those to be departure time minus dwell time, all in one write
+        dwell_time = trips_df[Trip.STOPTIMES_COLUMN_DWELL_TIME]
+        trips_df[Trip.STOPTIMES_COLUMN_ARRIVAL_TIME] = \
+            trips_df["new_arrival_time"].fillna(trips_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME] - dwell_time)
         # departure time is arrival time + dwell
-        trips_df.loc[:,Trip.STOPTIMES_COLUMN_DEPARTURE_TIME] = trips_df[Trip.STOPTIMES_COLUMN_ARRIVAL_TIME] + trips_df[Trip.STOPTIMES_COLUMN_DWELL_TIME]
+        trips_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME] = trips_df[Trip.STOPTIMES_COLUMN_ARRIVAL_TIME] + dwell_time
 
         # float version
-        trips_df[Trip.STOPTIMES_COLUMN_ARRIVAL_TIME_MIN] = \
-            trips_df[Trip.STOPTIMES_COLUMN_ARRIVAL_TIME].map(lambda x: \
-                60*x.time().hour + x.time().minute + (x.time().second / 60.0) )
-        trips_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME_MIN] = \
-            trips_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME].map(lambda x: \
-                60*x.time().hour + x.time().minute + (x.time().second / 60.0) )
-
-        FastTripsLogger.debug("Trips:update_trip_times() trips_df:\n%s\n" % \
-            trips_df.loc[trips_df[Trip.TRIPS_COLUMN_MAX_STOP_SEQUENCE]>1,[Trip.STOPTIMES_COLUMN_TRIP_ID, Trip.STOPTIMES_COLUMN_TRIP_ID_NUM,
-                      Trip.STOPTIMES_COLUMN_STOP_SEQUENCE,
-                      Trip.STOPTIMES_COLUMN_ARRIVAL_TIME, Trip.STOPTIMES_COLUMN_DEPARTURE_TIME,
-                      Trip.VEHICLES_COLUMN_MAXIMUM_SPEED_FPS, Trip.VEHICLES_COLUMN_ACCELERATION, Trip.VEHICLES_COLUMN_DECELERATION,
-                      Trip. VEHICLES_COLUMN_SEATED_CAPACITY,
-                      Trip.SIM_COL_VEH_BOARDS, Trip.SIM_COL_VEH_ALIGHTS, Trip.SIM_COL_VEH_ONBOARD, Trip.SIM_COL_VEH_STANDEES, Trip.SIM_COL_VEH_FRICTION,
-                      "does_stop","next_does_stop","next_is_last_stop",
-                      "accel_secs","decel_secs",
-                      Trip.STOPTIMES_COLUMN_DWELL_TIME_SEC,
-                      "travel_dwell_sec","travel_dwell_sec_cum","new_arrival_time"
-                      ]].head(15).to_string())
+        arrival_time   = trips_df[Trip.STOPTIMES_COLUMN_ARRIVAL_TIME  ].dt
+        departure_time = trips_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME].dt
+        trips_df[Trip.STOPTIMES_COLUMN_ARRIVAL_TIME_MIN  ] = 60*arrival_time.hour   + arrival_time.minute   + (arrival_time.second   / 60.0)
+        trips_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME_MIN] = 60*departure_time.hour + departure_time.minute + (departure_time.second / 60.0)
+
+        if FastTripsLogger.isEnabledFor(logging.DEBUG):
+            # pick out the first 15 multi-stop rows before selecting columns so we don't slice the whole frame for a debug print
+            debug_rows = trips_df.index[(trips_df[Trip.TRIPS_COLUMN_MAX_STOP_SEQUENCE]>1).values][:15]
+            FastTripsLogger.debug("Trips:update_trip_times() trips_df:\n%s\n",
+                trips_df.loc[debug_rows,[Trip.STOPTIMES_COLUMN_TRIP_ID, Trip.STOPTIMES_COLUMN_TRIP_ID_NUM,
+                          Trip.STOPTIMES_COLUMN_STOP_SEQUENCE,
+                          Trip.STOPTIMES_COLUMN_ARRIVAL_TIME, Trip.STOPTIMES_COLUMN_DEPARTURE_TIME,
+                          Trip.VEHICLES_COLUMN_MAXIMUM_SPEED_FPS, Trip.VEHICLES_COLUMN_ACCELERATION, Trip.VEHICLES_COLUMN_DECELERATION,
+                          Trip. VEHICLES_COLUMN_SEATED_CAPACITY,
+                          Trip.SIM_COL_VEH_BOARDS, Trip.SIM_COL_VEH_ALIGHTS, Trip.SIM_COL_VEH_ONBOARD, Trip.SIM_COL_VEH_STANDEES, Trip.SIM_COL_VEH_FRICTION,
+                          "does_stop","next_does_stop","next_is_last_stop",
+                          "accel_secs","decel_secs",
+                          Trip.STOPTIMES_COLUMN_DWELL_TIME_SEC,
+                          "travel_dwell_sec","travel_dwell_sec_cum","new_arrival_time"
+                          ]].to_string())
 
 
         assert(trips_df_len==len(trips_df))
@@ -837,7 +837,7 @@ class Trip(object):
                       "accel_secs","decel_secs",
                       "travel_dwell_sec","travel_dwell_sec_cum","travel_dwell_cum",
                       "new_arrival_time"], axis=1, inplace=True)
-        FastTripsLogger.debug("trips_df.dtypes=\n%s\n" % str(trips_df.dtypes))
+        FastTripsLogger.debug("trips_df.dtypes=\n%s\n", trips_df.dtypes)
 
         return trips_df
 
@@ -919,47 +919,30 @@ class Trip(object):
         Returns :py:class:`pandas.DataFrame` with `headway` column added.
         """
         # what if direction_id isn't specified
-        has_direction_id = Trip.TRIPS_COLUMN_DIRECTION_ID in trips_df.columns.values
+        has_direction_id = Trip.TRIPS_COLUMN_DIRECTION_ID in trips_df.columns
 
+        group_cols = [Trip.STOPTIMES_COLUMN_STOP_ID, Trip.TRIPS_COLUMN_ROUTE_ID]
         if has_direction_id:
-            stop_group = trips_df[[Trip.STOPTIMES_COLUMN_STOP_ID,
-                                   Trip.TRIPS_COLUMN_ROUTE_ID,
-                                   Trip.TRIPS_COLUMN_DIRECTION_ID,
-                                   Trip.STOPTIMES_COLUMN_DEPARTURE_TIME,
-                                   Trip.STOPTIMES_COLUMN_TRIP_ID,
-                                   Trip.STOPTIMES_COLUMN_STOP_SEQUENCE]].groupby([Trip.STOPTIMES_COLUMN_STOP_ID,
-                                                                                 Trip.TRIPS_COLUMN_ROUTE_ID,
-                                                                                 Trip.TRIPS_COLUMN_DIRECTION_ID])
-        else:
-            stop_group = trips_df[[Trip.STOPTIMES_COLUMN_STOP_ID,
-                                   Trip.TRIPS_COLUMN_ROUTE_ID,
-                                   Trip.STOPTIMES_COLUMN_DEPARTURE_TIME,
-                                   Trip.STOPTIMES_COLUMN_TRIP_ID,
-                                   Trip.STOPTIMES_COLUMN_STOP_SEQUENCE]].groupby([Trip.STOPTIMES_COLUMN_STOP_ID,
-                                                                                 Trip.TRIPS_COLUMN_ROUTE_ID])
-
-        stop_group_df = stop_group.apply(lambda x: x.sort_values(Trip.STOPTIMES_COLUMN_DEPARTURE_TIME))
+            group_cols.append(Trip.TRIPS_COLUMN_DIRECTION_ID)
+
+        # factorize the string keys once so the sort and the group boundaries work on ints
+        code_cols     = ["%s_code" % col for col in group_cols]
+        stop_group_df = trips_df[[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME,
+                                  Trip.STOPTIMES_COLUMN_TRIP_ID,
+                                  Trip.STOPTIMES_COLUMN_STOP_ID,
+                                  Trip.STOPTIMES_COLUMN_STOP_SEQUENCE]].assign(
+                            **{code_col:pd.factorize(trips_df[col])[0] for code_col, col in zip(code_cols, group_cols)})
+
+        # one sort puts each group together in departure order; no per-group python sort
+        stop_group_df = stop_group_df.sort_values(by=code_cols + [Trip.STOPTIMES_COLUMN_DEPARTURE_TIME])
         # set headway, in minutes
-        stop_group_shift_df = stop_group_df.shift()
-        stop_group_df['headway'] = (stop_group_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME] - stop_group_shift_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME])/np.timedelta64(1,'m')
-        # zero out the first in each group
-        if has_direction_id:
-            stop_group_df.loc[(stop_group_df.stop_id     !=stop_group_shift_df.stop_id     )|
-                              (stop_group_df.route_id    !=stop_group_shift_df.route_id    )|
-                              (stop_group_df.direction_id!=stop_group_shift_df.direction_id), 'headway'] = Trip.DEFAULT_HEADWAY
-        else:
-            stop_group_df.loc[(stop_group_df.stop_id     !=stop_group_shift_df.stop_id     )|
-                              (stop_group_df.route_id    !=stop_group_shift_df.route_id    ), 'headway'] = Trip.DEFAULT_HEADWAY
+        stop_group_df['headway'] = stop_group_df[Trip.STOPTIMES_COLUMN_DEPARTURE_TIME].diff()/np.timedelta64(1,'m')
+        # default the first in each group
+        stop_group_df.loc[(stop_group_df[code_cols].diff() != 0).any(axis=1), 'headway'] = Trip.DEFAULT_HEADWAY
         # print stop_group_df
 
         trips_df_len = len(trips_df)
-        trips_df = pd.merge(left  = trips_df,
-                                right = stop_group_df[[Trip.STOPTIMES_COLUMN_TRIP_ID,
-                                                       Trip.STOPTIMES_COLUMN_STOP_ID,
-                                                       Trip.STOPTIMES_COLUMN_STOP_SEQUENCE,
-                                                       'headway']],
-                                on    = [Trip.STOPTIMES_COLUMN_TRIP_ID,
-                                         Trip.STOPTIMES_COLUMN_STOP_ID,
-                                         Trip.STOPTIMES_COLUMN_STOP_SEQUENCE])
+        trip_stop_cols = [Trip.STOPTIMES_COLUMN_TRIP_ID, Trip.STOPTIMES_COLUMN_STOP_ID, Trip.STOPTIMES_COLUMN_STOP_SEQUENCE]
+        trips_df = trips_df.join(stop_group_df.set_index(trip_stop_cols)[['headway']], on=trip_stop_cols, how='inner')
         assert(len(trips_df)==trips_df_len)
         return trips_df
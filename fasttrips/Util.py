@@ -163,14 +163,15 @@ class Util(object):
         """
         Remove columns from the dataframe if they're *all* null since they're not useful and make thinks harder to look at.
         """
-        # a column full of "None" isn't useful
-        for colname in list(input_df.columns.values):
-            if input_df.dtypes[colname] != 'object': continue
-
-            null_count = pd.isnull(input_df[colname]).sum()
-            if null_count == len(input_df):
+        # a column full of "None" isn't useful; only object columns can be, so don't look at the rest
+        null_colnames = []
+        for colname in input_df.select_dtypes(include=['object']).columns:
+            if input_df[colname].isnull().all():
                 FastTripsLogger.debug("Dropping null column [%s]" % colname)
-                input_df.drop(colname, axis=1, inplace=inplace)
+                null_colnames.append(colname)
+
+        if len(null_colnames) > 0:
+            input_df.drop(null_colnames, axis=1, inplace=inplace)
 
         return input_df
 
@@ -324,8 +325,9 @@ class Util(object):
                     df_cols[col_idx] = new_colname
 
             elif str(df_toprint.dtypes[col_idx]) == "datetime64[ns]":
-                # print as HH:MM:SS
-                df_toprint[df_cols[col_idx]] = df_toprint[df_cols[col_idx]].apply(Util.datetime64_formatter)
+                # print as HH:MM:SS; same format as Util.datetime64_formatter but for the whole column at once
+                datetime_col = df_toprint[df_cols[col_idx]]
+                df_toprint[df_cols[col_idx]] = datetime_col.dt.strftime('%Y-%m-%d %H:%M:%S.%f').where(datetime_col.notnull(), "")
 
             # print df_toprint.dtypes[col_idx]
 
@@ -420,6 +422,29 @@ class Util(object):
         z.update(y)
         return z
 
+    @staticmethod
+    def cumsum_by_sorted_group(values, group_ids):
+        """
+        Cumulative sum of *values* that restarts at each new group, for input already sorted by group.
+        Equivalent to ``pandas.Series(values).groupby(group_ids).cumsum()`` but without the groupby:
+        one running sum is taken and each group's starting offset is subtracted back out.
+        Nulls are skipped and stay null, as with the groupby cumsum.
+
+        :param values: The values to sum.
+        :type values: :py:class:`numpy.ndarray` of floats
+        :param group_ids: The group of each value; rows of a group must be contiguous.
+        :type group_ids: :py:class:`numpy.ndarray`
+        :returns: :py:class:`numpy.ndarray` of floats, the same length as *values*
+
+        """
+        values       = np.asarray(values, dtype=np.float64)
+        group_ids    = np.asarray(group_ids)
+        values_cum   = np.cumsum(np.nan_to_num(values))
+        group_starts = np.flatnonzero(np.r_[True, group_ids[1:] != group_ids[:-1]])[:len(group_ids)]
+        start_offset = values_cum[group_starts] - np.nan_to_num(values[group_starts])
+        values_cum   = values_cum - np.repeat(start_offset, np.diff(np.r_[group_starts, len(group_ids)]))
+        return np.where(np.isnan(values), np.nan, values_cum)
+
     @staticmethod
     def parse_boolean(val):
         return val in ['true', 'True', 'TRUE', 1]
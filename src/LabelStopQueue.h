@@ -1,6 +1,7 @@
 #include <cassert>
 #include <exception>
 #include <stdexcept>
+#include <unordered_map>
 
 // Uncomment for debug detail for LabelStopQueue
 // #define DEBUG_LSQ
@@ -44,6 +45,13 @@ namespace fasttrips {
         }
     };
 
+    /// Hash for the (stop ID, is trip bool) keys of fasttrips::LabelStopQueue
+    struct LabelStopKeyHash {
+        size_t operator()(const std::pair<int, bool>& full_stop_id) const {
+            return 2*std::hash<int>()(full_stop_id.first) + (full_stop_id.second ? 1 : 0);
+        }
+    };
+
     class LabelStopQueueError : public std::runtime_error {
     public:
         LabelStopQueueError(const std::string& what_arg): std::runtime_error(what_arg) {}
@@ -72,8 +80,10 @@ namespace fasttrips {
             int    count_;  ///< number of instances of this stop in the labelstop_priority_queue_ (valid and invalid)
         } LabelCount;
 
+        typedef std::unordered_map< std::pair<int, bool>, LabelCount, struct LabelStopKeyHash> LabelCountMap;
+
         /** Keep track of the lowest label and the count for each (stop, is_trip bool) */
-        std::map< std::pair<int, bool>, LabelCount> labelstop_map_;
+        LabelCountMap labelstop_map_;
 
         int valid_count_;
 
@@ -82,33 +92,34 @@ namespace fasttrips {
         ~LabelStopQueue() {}
 
         void push(const LabelStop& val) {
-            // if the stop is not in here, no problem!
-            std::pair<int,bool> full_stop_id = std::make_pair(val.stop_id_, val.is_trip_);
+            // look up (or create) the count info once; if the stop is not in here, no problem!
+            LabelCount lc = { val.label_, true, 1 };
+            std::pair<LabelCountMap::iterator, bool> result =
+                labelstop_map_.insert(std::make_pair(std::make_pair(val.stop_id_, val.is_trip_), lc));
+            LabelCount& count_info = result.first->second;
 
-            if (labelstop_map_.find(full_stop_id) == labelstop_map_.end()) {
+            if (result.second) {
                 labelstop_priority_queue_.push(val);
-                LabelCount lc = { val.label_, true, 1 };
-                labelstop_map_[full_stop_id] = lc;
                 valid_count_++;
                 return;
             }
 
             // if not valid in the queue, then we've popped out all valid instances from the priority queue so it's like it's not here
-            if (!labelstop_map_[full_stop_id].valid_) {
+            if (!count_info.valid_) {
                 labelstop_priority_queue_.push(val);
-                labelstop_map_[full_stop_id].label_     = val.label_;
-                labelstop_map_[full_stop_id].valid_     = true;
-                labelstop_map_[full_stop_id].count_    += 1;
+                count_info.label_     = val.label_;
+                count_info.valid_     = true;
+                count_info.count_    += 1;
                 valid_count_++;
                 return;
             }
 
             // The stop is in the queue, valid.  Look at the label.
             // If the label is smaller, add this one and invalidate the other
-            if (val.label_ < labelstop_map_[full_stop_id].label_) {
+            if (val.label_ < count_info.label_) {
                 labelstop_priority_queue_.push(val);
-                labelstop_map_[full_stop_id].label_ = val.label_;
-                labelstop_map_[full_stop_id].count_ += 1;
+                count_info.label_  = val.label_;
+                count_info.count_ += 1;
                 // no additional valid counts
             }
             // otherwise the label is bigger -- don't add it since the smaller one will cause reprocessing
@@ -126,7 +137,7 @@ namespace fasttrips {
                 const LabelStop& ls = labelstop_priority_queue_.top();
                 std::pair<int, bool> full_stop_id = std::make_pair(ls.stop_id_, ls.is_trip_);
 
-                std::map< std::pair<int, bool>, LabelCount>::iterator ls_iter = labelstop_map_.find(full_stop_id);
+                LabelCountMap::iterator ls_iter = labelstop_map_.find(full_stop_id);
 
                 // assert we have the count info
                 if (ls_iter == labelstop_map_.end()) {
@@ -495,12 +495,15 @@ namespace fasttrips {
     {
         const LinkSet& linkset = (of_trip_links ? linkset_trip_ : linkset_nontrip_);
 
-        double earliest_dep_latest_arr = lowestCostStopState(of_trip_links).deparr_time_;
-        for (StopStateMap::const_iterator it = linkset.stop_state_map_.begin(); it != linkset.stop_state_map_.end(); ++it)
-        {
-            if (outbound) {
+        // seed with the first link rather than looking up the lowest cost one; the reduction visits every link anyway
+        StopStateMap::const_iterator it = linkset.stop_state_map_.begin();
+        double earliest_dep_latest_arr = it->second.deparr_time_;
+        if (outbound) {
+            for (++it; it != linkset.stop_state_map_.end(); ++it) {
                 earliest_dep_latest_arr = std::min(earliest_dep_latest_arr, it->second.deparr_time_);
-            } else {
+            }
+        } else {
+            for (++it; it != linkset.stop_state_map_.end(); ++it) {
                 earliest_dep_latest_arr = std::max(earliest_dep_latest_arr, it->second.deparr_time_);
             }
         }
@@ -727,6 +730,10 @@ namespace fasttrips {
         double sum_exp          = 0;
         linkset.max_cum_prob_i_ = 0;
 
+        // exponentiated cost for each link in cost map order, so the second pass doesn't recompute it
+        std::vector<double> exp_costs(linkset.cost_map_.size(), 0.0);
+        size_t              link_num = 0;
+
         // for logging
         std::map<StopStateKey, std::string> ssk_log;
         const std::pair<int, StopState>* last_trip = NULL;
@@ -734,7 +741,7 @@ namespace fasttrips {
 
 
         // Setup the probabilities
-        for (CostToStopState::iterator iter = linkset.cost_map_.begin(); iter != linkset.cost_map_.end(); ++iter)
+        for (CostToStopState::iterator iter = linkset.cost_map_.begin(); iter != linkset.cost_map_.end(); ++iter, ++link_num)
         {
             const StopStateKey& ssk   = iter->second;
             StopState&           ss   = linkset.stop_state_map_[ssk];
@@ -777,8 +784,9 @@ namespace fasttrips {
                 }
 
                 // calculating denominator
-                ss.cum_prob_i_ = 0;
-                sum_exp += exp(UTILS_CONVERSION_*-1.0*ss.cost_/STOCH_DISPERSION_);
+                ss.cum_prob_i_       = 0;
+                exp_costs[link_num]  = exp(UTILS_CONVERSION_*-1.0*ss.cost_/STOCH_DISPERSION_);
+                sum_exp             += exp_costs[link_num];
                 valid_links += 1;
             }
             else
@@ -789,8 +797,9 @@ namespace fasttrips {
                 }
                 else {
                     // calculating denominator
-                    ss.cum_prob_i_ = 0;
-                    sum_exp += exp(UTILS_CONVERSION_*-1.0*ss.cost_/STOCH_DISPERSION_);
+                    ss.cum_prob_i_       = 0;
+                    exp_costs[link_num]  = exp(UTILS_CONVERSION_*-1.0*ss.cost_/STOCH_DISPERSION_);
+                    sum_exp             += exp_costs[link_num];
                     valid_links += 1;
                 }
             }
@@ -806,7 +815,8 @@ namespace fasttrips {
         }
 
         // fix up the probabilities
-        for (CostToStopState::iterator iter = linkset.cost_map_.begin(); iter != linkset.cost_map_.end(); ++iter)
+        link_num = 0;
+        for (CostToStopState::iterator iter = linkset.cost_map_.begin(); iter != linkset.cost_map_.end(); ++iter, ++link_num)
         {
             const StopStateKey& ssk   = iter->second;
             StopState&           ss   = linkset.stop_state_map_[ssk];
@@ -818,7 +828,7 @@ namespace fasttrips {
                 linkset.max_cum_prob_i_ = ss.cum_prob_i_;
             }
             else {
-                ss.probability_ = exp(UTILS_CONVERSION_*-1.0*ss.cost_/STOCH_DISPERSION_) / sum_exp;
+                ss.probability_ = exp_costs[link_num] / sum_exp;
                 // this will be true if it's not a real number -- e.g. the denom was too small and we ended up doing 0/0
                 if (ss.probability_ != ss.probability_) {
                     ss.probability_ = 0;
@@ -997,7 +1007,7 @@ namespace fasttrips {
         std::ostream& trace_file,
         const PathFinder& pf,
         const FarePeriod& fare_period,
-        const std::map<int, Hyperlink>& stop_states) const
+        const StopStates& stop_states) const
     {
         // if we opted not to do this through configuration, just return the fare
         if (Hyperlink::TRANSFER_FARE_IGNORE_PATHFINDING_) {
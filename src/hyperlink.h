@@ -6,6 +6,7 @@
 #include <iostream>
 #include <map>
 #include <set>
+#include <unordered_map>
 #include <vector>
 
 #include "pathspec.h"
@@ -216,14 +217,16 @@ namespace fasttrips {
                                    std::ostream& trace_file,
                                    const PathFinder& pf,
                                    const FarePeriod& fare_period,
-                                   const std::map<int, Hyperlink>& stop_states) const;
+                                   const std::unordered_map<int, Hyperlink>& stop_states) const;
 
     };
 
     /**
      * The path finding algorithm stores StopState data in this structure.
+     * Keyed by stop id; it's only ever probed by id (never iterated) so a hash map is used.
+     * References to the Hyperlinks remain valid when new stops are inserted.
      */
-    typedef std::map<int, Hyperlink> StopStates;
+    typedef std::unordered_map<int, Hyperlink> StopStates;
 
 }
 
@@ -327,6 +327,29 @@ namespace fasttrips {
             std::cout << " => Read " << attrs_read << " lines" << std::endl;
         }
         transfer_file.close();
+
+        buildLabelTransfers(transfer_links_o_d_, label_transfers_o_d_);
+        buildLabelTransfers(transfer_links_d_o_, label_transfers_d_o_);
+    }
+
+    void PathFinder::buildLabelTransfers(const StopStopToAttr& transfer_links, StopToTransferLinks& label_transfers) const
+    {
+        label_transfers.clear();
+        for (StopStopToAttr::const_iterator ssa_iter = transfer_links.begin(); ssa_iter != transfer_links.end(); ++ssa_iter)
+        {
+            std::vector<TransferLink>& links = label_transfers[ssa_iter->first];
+            links.reserve(ssa_iter->second.size());
+            for (StopToAttr::const_iterator sa_iter = ssa_iter->second.begin(); sa_iter != ssa_iter->second.end(); ++sa_iter)
+            {
+                TransferLink link;
+                link.stop_id_                        = sa_iter->first;
+                link.time_min_                       = sa_iter->second.find("time_min")->second;
+                link.dist_                           = sa_iter->second.find("dist")->second;
+                link.label_attr_                     = sa_iter->second;
+                link.label_attr_["transfer_penalty"] = 1.0; // TODO: make configurable or base off of IVT coefficient
+                links.push_back(link);
+            }
+        }
     }
 
     void PathFinder::readTripInfo() {
@@ -526,6 +549,8 @@ namespace fasttrips {
             // reset these
             trip_stop_times_.clear();
             stop_trip_times_.clear();
+            stop_arrive_index_.clear();
+            stop_depart_index_.clear();
         }
 
         for (int i=0; i<num_stoptimes; ++i) {
@@ -553,6 +578,21 @@ namespace fasttrips {
                 std::cerr << ", overcap:" << stt.overcap_ << std::endl;
             }
         }
+
+        // index each stop's trips by time so getTripsWithinTime() doesn't have to scan them all
+        for (StopTimesMap::const_iterator stt_iter = stop_trip_times_.begin(); stt_iter != stop_trip_times_.end(); ++stt_iter)
+        {
+            StopTimesIndex& arrive_index = stop_arrive_index_[stt_iter->first];
+            StopTimesIndex& depart_index = stop_depart_index_[stt_iter->first];
+            arrive_index.reserve(stt_iter->second.size());
+            depart_index.reserve(stt_iter->second.size());
+            for (size_t stt_index = 0; stt_index < stt_iter->second.size(); ++stt_index) {
+                arrive_index.push_back(std::make_pair(stt_iter->second[stt_index].arrive_time_, static_cast<int>(stt_index)));
+                depart_index.push_back(std::make_pair(stt_iter->second[stt_index].depart_time_, static_cast<int>(stt_index)));
+            }
+            std::sort(arrive_index.begin(), arrive_index.end());
+            std::sort(depart_index.begin(), depart_index.end());
+        }
     }
 
     void PathFinder::setBumpWait(int*       bw_index,
@@ -576,10 +616,14 @@ namespace fasttrips {
 
         transfer_links_o_d_.clear();
         transfer_links_d_o_.clear();
+        label_transfers_o_d_.clear();
+        label_transfers_d_o_.clear();
 
         trip_info_.clear();
         trip_stop_times_.clear();
         stop_trip_times_.clear();
+        stop_arrive_index_.clear();
+        stop_depart_index_.clear();
         route_fares_.clear();
         fare_periods_.clear();
         fare_transfer_rules_.clear();
@@ -883,12 +927,12 @@ namespace fasttrips {
         bool rejected = false;
 
         // initialize the hyperlink if we need to
-        if (stop_states.find(stop_id) == stop_states.end()) {
-            Hyperlink h(stop_id, path_spec.outbound_);
-            stop_states[stop_id] = h;
+        StopStates::iterator ssi = stop_states.find(stop_id);
+        if (ssi == stop_states.end()) {
+            ssi = stop_states.insert(std::make_pair(stop_id, Hyperlink(stop_id, path_spec.outbound_))).first;
         }
 
-        Hyperlink& hyperlink = stop_states[stop_id];
+        Hyperlink& hyperlink = ssi->second;
 
         // keep track if the state changed (label or time window)
         // if so, we'll want to trigger dealing with the effects by adding it to the queue
@@ -998,8 +1042,9 @@ namespace fasttrips {
                 trace_file << mode_num_to_str_.find(supply_mode_num)->second << std::endl;
             }
 
+            AccessEgressLinkAttr::const_iterator iter_aelk_end = access_egress_links_.upper_bound(start_taz_id, supply_mode_num);
             for (AccessEgressLinkAttr::const_iterator iter_aelk  = access_egress_links_.lower_bound(start_taz_id, supply_mode_num);
-                                                      iter_aelk != access_egress_links_.upper_bound(start_taz_id, supply_mode_num); ++iter_aelk)
+                                                      iter_aelk != iter_aelk_end; ++iter_aelk)
             {
 
                 const AccessEgressLinkKey& aelk = iter_aelk->first;
@@ -1118,18 +1163,18 @@ namespace fasttrips {
         // are there other relevant transfers?
         // if outbound, going backwards, so transfer TO this current stop
         // if inbound, going forwards, so transfer FROM this current stop
-        const StopStopToAttr&          transfer_links  = (path_spec.outbound_ ? transfer_links_d_o_ : transfer_links_o_d_);
-        StopStopToAttr::const_iterator transfer_map_it = transfer_links.find(current_label_stop.stop_id_);
-        bool                           found_transfers = (transfer_map_it != transfer_links.end());
+        const StopToTransferLinks&          transfer_links  = (path_spec.outbound_ ? label_transfers_d_o_ : label_transfers_o_d_);
+        StopToTransferLinks::const_iterator transfer_map_it = transfer_links.find(current_label_stop.stop_id_);
+        bool                                found_transfers = (transfer_map_it != transfer_links.end());
 
         if (!found_transfers) { return; }
 
-        for (StopToAttr::const_iterator transfer_it = transfer_map_it->second.begin();
+        for (std::vector<TransferLink>::const_iterator transfer_it = transfer_map_it->second.begin();
              transfer_it != transfer_map_it->second.end(); ++transfer_it)
         {
-            xfer_stop_id    = transfer_it->first;
-            transfer_time   = transfer_it->second.find("time_min")->second;
-            transfer_dist   = transfer_it->second.find("dist")->second;
+            xfer_stop_id    = transfer_it->stop_id_;
+            transfer_time   = transfer_it->time_min_;
+            transfer_dist   = transfer_it->dist_;
             // outbound: departure time = latest departure - transfer
             //  inbound: arrival time   = earliest arrival + transfer
             deparr_time     = current_deparr_time - (transfer_time*dir_factor);
@@ -1137,9 +1182,7 @@ namespace fasttrips {
             // stochastic/hyperpath: cost update
             if (path_spec.hyperpath_)
             {
-                Attributes link_attr            = transfer_it->second;
-                link_attr["transfer_penalty"]   = 1.0; // TODO: make configurable or base off of IVT coefficient
-                link_cost                       = tallyLinkCost(transfer_supply_mode_, path_spec, trace_file, *transfer_weights, link_attr);
+                link_cost                       = tallyLinkCost(transfer_supply_mode_, path_spec, trace_file, *transfer_weights, transfer_it->label_attr_);
                 cost                            = nonwalk_label + link_cost;
             }
             // deterministic: label = cost = total time, just additive
@@ -1151,11 +1194,11 @@ namespace fasttrips {
                 // check (departure mode, stop) if someone's waiting already
                 // curious... this only applies to OUTBOUND
                 // TODO: capacity stuff
-                if (path_spec.outbound_)
+                if (path_spec.outbound_ && !bump_wait_.empty())
                 {
                     int current_trip = current_stop_state.lowestCostStopState(true).trip_id_;
                     TripStop ts = { current_trip, current_stop_state.lowestCostStopState(true).seq_, current_label_stop.stop_id_ };
-                    std::map<TripStop, double, struct TripStopCompare>::const_iterator bwi = bump_wait_.find(ts);
+                    BumpWaitMap::const_iterator bwi = bump_wait_.find(ts);
                     if (bwi != bump_wait_.end())
                     {
                         // time a bumped passenger started waiting
@@ -1257,8 +1300,9 @@ namespace fasttrips {
              iter_s2w != iter_weights->second.end(); ++iter_s2w) {
             int supply_mode_num = iter_s2w->first;
 
+            AccessEgressLinkAttr::const_iterator iter_aelk_end = access_egress_links_.upper_bound(end_taz_id, supply_mode_num, current_label_stop.stop_id_);
             for (AccessEgressLinkAttr::const_iterator iter_aelk  = access_egress_links_.lower_bound(end_taz_id, supply_mode_num, current_label_stop.stop_id_);
-                                                      iter_aelk != access_egress_links_.upper_bound(end_taz_id, supply_mode_num, current_label_stop.stop_id_); ++iter_aelk)
+                                                      iter_aelk != iter_aelk_end; ++iter_aelk)
             {
 
                 const AccessEgressLinkKey& aelk = iter_aelk->first;
@@ -1293,10 +1337,10 @@ namespace fasttrips {
                     cost        = current_stop_state.lowestCostStopState(true).cost_ + link_cost;
 
                     // capacity check
-                    if (path_spec.outbound_)
+                    if (path_spec.outbound_ && !bump_wait_.empty())
                     {
                         TripStop ts = { current_stop_state.lowestCostStopState(true).deparr_mode_, current_stop_state.lowestCostStopState(true).seq_, current_label_stop.stop_id_ };
-                        std::map<TripStop, double, struct TripStopCompare>::const_iterator bwi = bump_wait_.find(ts);
+                        BumpWaitMap::const_iterator bwi = bump_wait_.find(ts);
                         if (bwi != bump_wait_.end()) {
                             // time a bumped passenger started waiting
                             double latest_time = bwi->second;
@@ -1346,7 +1390,7 @@ namespace fasttrips {
         LabelStopQueue& label_stop_queue,
         int label_iteration,
         const LabelStop& current_label_stop,
-        std::unordered_set<int>& trips_done) const
+        std::vector<TripStopTime>& relevant_trips) const
     {
         double dir_factor = path_spec.outbound_ ? 1.0 : -1.0;
 
@@ -1363,14 +1407,18 @@ namespace fasttrips {
         double     latest_dep_earliest_arr  = current_stop_state.latestDepartureEarliestArrival(false);
 
         // Update by trips
-        std::vector<TripStopTime> relevant_trips;
+        relevant_trips.clear();
         getTripsWithinTime(current_label_stop.stop_id_, path_spec.outbound_, latest_dep_earliest_arr, relevant_trips);
         for (std::vector<TripStopTime>::const_iterator it=relevant_trips.begin(); it != relevant_trips.end(); ++it) {
 
             // the trip info for this trip
             const TripInfo& trip_info = trip_info_.find(it->trip_id_)->second;
+            // the TripStopTimes for this trip; looked up once and used for both the current stop and the board/alight loop
+            StopTimesMap::const_iterator tstiter = trip_stop_times_.find(it->trip_id_);
+            assert(tstiter != trip_stop_times_.end());
+            const std::vector<TripStopTime>& possible_stops = tstiter->second;
             // the trip stop time for this trip
-            const TripStopTime& tst = getTripStopTime(it->trip_id_, it->seq_);
+            const TripStopTime& tst = possible_stops[it->seq_-1];  // stop sequences start at 1
 
             // get the weights applicable for this trip
             SupplyModeToNamedWeights::const_iterator iter_sm2nw = iter_weights->second.find(trip_info.supply_mode_num_);
@@ -1396,8 +1444,8 @@ namespace fasttrips {
                 if (path_spec.trace_) { trace_file << "wait_time < 0 -- this shouldn't happen!" << std::endl; }
             }
 
-            // deterministic path-finding: check capacities
-            if (!path_spec.hyperpath_) {
+            // deterministic path-finding: check capacities (nothing to check until someone has been bumped)
+            if (!path_spec.hyperpath_ && !bump_wait_.empty()) {
                 TripStop check_for_bump_wait;
                 double arrive_time;
                 if (path_spec.outbound_) {
@@ -1417,7 +1465,7 @@ namespace fasttrips {
                     // arrive for this trip
                     arrive_time = current_stop_state.lowestCostStopState(false).deparr_time_;
                 }
-                std::map<TripStop, double, struct TripStopCompare>::const_iterator bwi = bump_wait_.find(check_for_bump_wait);
+                BumpWaitMap::const_iterator bwi = bump_wait_.find(check_for_bump_wait);
                 if (bwi != bump_wait_.end()) {
                     // time a bumped passenger started waiting
                     double latest_time = bwi->second;
@@ -1436,17 +1484,12 @@ namespace fasttrips {
                 }
             }
 
-            // get the TripStopTimes for this trip
-            std::map<int, std::vector<TripStopTime> >::const_iterator tstiter = trip_stop_times_.find(it->trip_id_);
-            assert(tstiter != trip_stop_times_.end());
-            const std::vector<TripStopTime>& possible_stops = tstiter->second;
-
             // these are the relevant potential trips/stops; iterate through them
             unsigned int start_seq = path_spec.outbound_ ? 1 : it->seq_+1;
             unsigned int end_seq   = path_spec.outbound_ ? it->seq_-1 : possible_stops.size();
             for (unsigned int seq_num = start_seq; seq_num <= end_seq; ++seq_num) {
                 // possible board for outbound / alight for inbound
-                const TripStopTime& possible_board_alight = possible_stops.at(seq_num-1);
+                const TripStopTime& possible_board_alight = possible_stops[seq_num-1];
 
                 // new label = length of trip so far if the passenger boards/alights at this stop
                 int board_alight_stop = possible_board_alight.stop_id_;
@@ -1614,7 +1657,6 @@ namespace fasttrips {
                 addStopState(path_spec, trace_file, board_alight_stop, ss, &current_stop_state, stop_states, label_stop_queue);
 
             }
-            trips_done.insert(it->trip_id_);
         }
     }
 
@@ -1627,8 +1669,8 @@ namespace fasttrips {
         int& max_process_count) const
     {
         int label_iterations = 1;
-        std::unordered_set<int> stop_done;
-        std::unordered_set<int> trips_done;
+        // scratch space for updateStopStatesForTrips(), reused across label iterations so it only grows
+        std::vector<TripStopTime> relevant_trips;
         double dir_factor = path_spec.outbound_ ? 1.0 : -1.0;
         LabelStop last_label_stop;
 
@@ -1719,7 +1761,7 @@ namespace fasttrips {
                                          label_stop_queue,
                                          label_iterations,
                                          current_label_stop,
-                                         trips_done);
+                                         relevant_trips);
             }
 
             //  Done with this label iteration!
@@ -1789,8 +1831,9 @@ namespace fasttrips {
                 trace_file << mode_num_to_str_.find(supply_mode_num)->second << std::endl;
             }
 
+            AccessEgressLinkAttr::const_iterator iter_aelk_end = access_egress_links_.upper_bound(end_taz_id, supply_mode_num);
             for (AccessEgressLinkAttr::const_iterator iter_aelk  = access_egress_links_.lower_bound(end_taz_id, supply_mode_num);
-                                                      iter_aelk != access_egress_links_.upper_bound(end_taz_id, supply_mode_num); ++iter_aelk)
+                                                      iter_aelk != iter_aelk_end; ++iter_aelk)
             {
 
                 // Iterate through the links for the given supply mode
@@ -1860,8 +1903,9 @@ namespace fasttrips {
             }
 
             // Are there any egress/access links for the supply mode?
+            AccessEgressLinkAttr::const_iterator iter_aelk_end = access_egress_links_.upper_bound(end_taz_id, supply_mode_num);
             for (AccessEgressLinkAttr::const_iterator iter_aelk  = access_egress_links_.lower_bound(end_taz_id, supply_mode_num);
-                                                      iter_aelk != access_egress_links_.upper_bound(end_taz_id, supply_mode_num); ++iter_aelk)
+                                                      iter_aelk != iter_aelk_end; ++iter_aelk)
             {
                 int     stop_id                 = iter_aelk->first.stop_id_;
                 double  earliest_dep_latest_arr = PathFinder::MAX_DATETIME;
@@ -1917,10 +1961,10 @@ namespace fasttrips {
                     cost      = current_stop_state.lowestCostStopState(true).cost_ + link_cost;
 
                     // capacity check
-                    if (path_spec.outbound_)
+                    if (path_spec.outbound_ && !bump_wait_.empty())
                     {
                         TripStop ts = { current_stop_state.lowestCostStopState(true).deparr_mode_, current_stop_state.lowestCostStopState(true).seq_, stop_id };
-                        std::map<TripStop, double, struct TripStopCompare>::const_iterator bwi = bump_wait_.find(ts);
+                        BumpWaitMap::const_iterator bwi = bump_wait_.find(ts);
                         if (bwi != bump_wait_.end()) {
                             // time a bumped passenger started waiting
                             double latest_time = bwi->second;
@@ -2102,10 +2146,11 @@ namespace fasttrips {
                     if (paths_iter != pathset.end()) {
                         paths_iter->second.count_ += 1;
                     } else {
-                        PathInfo pi = { 1, 0, 0 };  // count is 1
+                        // stash the exponentiated cost in probability_; it's normalized by logsum below
+                        PathInfo pi = { 1, exp(-1.0*new_path.cost()/Hyperlink::STOCH_DISPERSION_), 0 };  // count is 1
                         pathset[new_path] = pi;
 
-                        logsum += exp(-1.0*new_path.cost()/Hyperlink::STOCH_DISPERSION_);
+                        logsum += pi.probability_;
                     }
                     if (path_spec.trace_) { trace_file << "pathsset size = " << pathset.size() << " new? " << (paths_iter == pathset.end()) << std::endl; }
                 } else {
@@ -2128,7 +2173,7 @@ namespace fasttrips {
 
             for (PathSet::iterator paths_iter = pathset.begin(); paths_iter != pathset.end(); ++paths_iter)
             {
-                paths_iter->second.probability_ = exp(-1.0*paths_iter->first.cost()/Hyperlink::STOCH_DISPERSION_)/logsum;
+                paths_iter->second.probability_ = paths_iter->second.probability_/logsum;
                 path_count += 1;
 
                 // Is this under the min path probability AND we have enough paths?
@@ -2235,7 +2280,7 @@ namespace fasttrips {
      */
     double PathFinder::getScheduledDeparture(int trip_id, int stop_id, int sequence) const
     {
-        std::map<int, std::vector<TripStopTime> >::const_iterator tsti = trip_stop_times_.find(trip_id);
+        StopTimesMap::const_iterator tsti = trip_stop_times_.find(trip_id);
         if (tsti == trip_stop_times_.end()) { return -1; }
 
         for (size_t stt_index = 0; stt_index < tsti->second.size(); ++stt_index)
@@ -2317,17 +2362,22 @@ namespace fasttrips {
     void PathFinder::getTripsWithinTime(int stop_id, bool outbound, double timepoint, std::vector<TripStopTime>& return_trips) const
     {
         // are there any trips for this stop?
-        std::map<int, std::vector<TripStopTime> >::const_iterator mapiter = stop_trip_times_.find(stop_id);
+        StopTimesMap::const_iterator mapiter = stop_trip_times_.find(stop_id);
         if (mapiter == stop_trip_times_.end()) {
             return;
         }
-        for (std::vector<TripStopTime>::const_iterator it  = mapiter->second.begin();
-                                                       it != mapiter->second.end();   ++it) {
-            if (outbound && (it->arrive_time_ <= timepoint) && (it->arrive_time_ > timepoint-Hyperlink::TIME_WINDOW_)) {
-                return_trips.push_back(*it);
-            } else if (!outbound && (it->depart_time_ >= timepoint) && (it->depart_time_ < timepoint+Hyperlink::TIME_WINDOW_)) {
-                return_trips.push_back(*it);
-            }
+        const StopTimesIndexMap& index_map = outbound ? stop_arrive_index_ : stop_depart_index_;
+        StopTimesIndexMap::const_iterator index_iter = index_map.find(stop_id);
+        if (index_iter == index_map.end()) {
+            return;
+        }
+
+        // find the window in the time-sorted index
+        // return them in stop_trip_times_ order, as the labeling results depend on it
+        std::vector<int> window_indices;
+        findStopTimesWithinWindow(index_iter->second, outbound, timepoint, Hyperlink::TIME_WINDOW_, window_indices);
+        for (std::vector<int>::const_iterator it = window_indices.begin(); it != window_indices.end(); ++it) {
+            return_trips.push_back(mapiter->second[*it]);
         }
     }
 
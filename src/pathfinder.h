@@ -16,8 +16,9 @@
 #include "LabelStopQueue.h"
 #include "hyperlink.h"
 #include "path.h"
+#include "stop_times_index.h"
 
-#include <unordered_set>
+#include <unordered_map>
 
 namespace fasttrips {
 
@@ -68,8 +69,18 @@ namespace fasttrips {
 
 
     // Transfer information: stop id -> stop id -> attribute map
+    // The outer level is only ever probed by stop id, so it's hashed; the inner level is iterated in stop order.
     typedef std::map<int, Attributes> StopToAttr;
-    typedef std::map<int, StopToAttr> StopStopToAttr;
+    typedef std::unordered_map<int, StopToAttr> StopStopToAttr;
+
+    /// A transfer link as the labeling loop wants it, with the attribute lookups done once at read time
+    typedef struct {
+        int        stop_id_;        ///< the stop at the other end of the transfer
+        double     time_min_;       ///< transfer time, in minutes
+        double     dist_;           ///< transfer distance
+        Attributes label_attr_;     ///< link attributes including the labeling transfer penalty
+    } TransferLink;
+    typedef std::unordered_map<int, std::vector<TransferLink> > StopToTransferLinks;
 
 
     /// Supply data: access/egress time and cost between TAZ and stops
@@ -97,6 +108,12 @@ namespace fasttrips {
         double  overcap_;         /// number of passengers overcap
     } TripStopTime;
 
+    /// Supply data: trip id (or stop id) -> TripStopTimes.  Only probed by id, so it's hashed.
+    typedef std::unordered_map<int, std::vector<TripStopTime> > StopTimesMap;
+
+    /// Supply data: stop id -> StopTimesIndex
+    typedef std::unordered_map<int, StopTimesIndex> StopTimesIndexMap;
+
     /// For capacity lookups: TripStop definition
     typedef struct {
         int     trip_id_;
@@ -104,14 +121,22 @@ namespace fasttrips {
         int     stop_id_;
     } TripStop;
 
-    /// Comparator for the PathFinder::bump_wait_ std::map
-    struct TripStopCompare {
+    /// Hash for the PathFinder::bump_wait_ keys; like the equality below, only the trip and sequence matter
+    struct TripStopHash {
+        size_t operator()(const TripStop &ts) const {
+            return 31*std::hash<int>()(ts.trip_id_) + std::hash<int>()(ts.seq_);
+        }
+    };
+
+    /// Equality for the PathFinder::bump_wait_ keys
+    struct TripStopEqual {
         bool operator()(const TripStop &ts1, const TripStop &ts2) const {
-            return ((ts1.trip_id_ < ts2.trip_id_) ||
-                    ((ts1.trip_id_ == ts2.trip_id_) && (ts1.seq_ < ts2.seq_)));
+            return ((ts1.trip_id_ == ts2.trip_id_) && (ts1.seq_ == ts2.seq_));
         }
     };
 
+    typedef std::unordered_map<TripStop, double, struct TripStopHash, struct TripStopEqual> BumpWaitMap;
+
     /// For fare lookups FarePeriod index
     typedef struct {
         int         route_id_;          ///< Route id number, if applicable
@@ -223,12 +248,18 @@ namespace fasttrips {
         /// Transfer information: stop id -> stop id -> attributes
         StopStopToAttr transfer_links_o_d_;
         StopStopToAttr transfer_links_d_o_;
+        /// Transfer links flattened for labeling: stop id -> transfer links, in stop id order
+        StopToTransferLinks label_transfers_o_d_;
+        StopToTransferLinks label_transfers_d_o_;
         /// Trip information: trip id -> Trip Info
         std::map<int, TripInfo> trip_info_;
         /// Trip information: trip id -> vector of [trip id, sequence, stop id, arrival time, departure time, overcap]
-        std::map<int, std::vector<TripStopTime> > trip_stop_times_;
+        StopTimesMap trip_stop_times_;
         /// Stop information: stop id -> vector of [trip id, sequence, stop id, arrival time, departure time, overcap]
-        std::map<int, std::vector<TripStopTime> > stop_trip_times_;
+        StopTimesMap stop_trip_times_;
+        /// Stop information: stop id -> stop_trip_times_ indices sorted by arrival time (for outbound) and departure time (for inbound)
+        StopTimesIndexMap stop_arrive_index_;
+        StopTimesIndexMap stop_depart_index_;
         // Fare information: route id -> fare id
         std::map<int, int> route_fares_;
         // Fare information: route/origin zone/dest zone -> fare period
@@ -251,7 +282,7 @@ namespace fasttrips {
          * This structure maps the fasttrips::TripStop to the arrival time of the first waiting
          * would-be passenger.
          */
-        std::map<TripStop, double, struct TripStopCompare> bump_wait_;
+        BumpWaitMap bump_wait_;
 
         /**
          * Read the intermediate files mapping integer IDs to strings
@@ -265,6 +296,7 @@ namespace fasttrips {
         void readModeIds();
         void readAccessLinks();
         void readTransferLinks();
+        void buildLabelTransfers(const StopStopToAttr& transfer_links, StopToTransferLinks& label_transfers) const;
         void readTripInfo();
         void readWeights();
 
@@ -326,7 +358,7 @@ namespace fasttrips {
                                   LabelStopQueue& label_stop_queue,
                                   int label_iteration,
                                   const LabelStop& current_label_stop,
-                                  std::unordered_set<int>& trips_done) const;
+                                  std::vector<TripStopTime>& relevant_trips) const;
 
         /**
          * Label stops by:
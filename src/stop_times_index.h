@@ -0,0 +1,54 @@
+/**
+ * \file stop_times_index.h
+ *
+ * Defines the time-sorted index used to find a stop's trips within a time window.
+ */
+
+#ifndef STOP_TIMES_INDEX_H
+#define STOP_TIMES_INDEX_H
+
+#include <algorithm>
+#include <utility>
+#include <vector>
+
+namespace fasttrips {
+
+    /// Supply data: (time, index into a stop's TripStopTimes), sorted by time for windowed lookups
+    typedef std::vector< std::pair<double, int> > StopTimesIndex;
+
+    /// Comparator for std::lower_bound/std::upper_bound searches of a StopTimesIndex by time
+    struct TimeIndexCompare {
+        bool operator()(const std::pair<double, int>& ti, double timepoint) const { return ti.first < timepoint; }
+        bool operator()(double timepoint, const std::pair<double, int>& ti) const { return timepoint < ti.first; }
+    };
+
+    /**
+     * Appends the indices of the entries in the time-sorted *time_index* that fall within the window to *window_indices*,
+     * in ascending index order (so callers see them in their original order).
+     *
+     * If outbound, the window is (timepoint-time_window, timepoint]
+     * If inbound,  the window is [timepoint, timepoint+time_window)
+     */
+    inline void findStopTimesWithinWindow(const StopTimesIndex& time_index, bool outbound, double timepoint,
+                                          double time_window, std::vector<int>& window_indices)
+    {
+        StopTimesIndex::const_iterator window_begin, window_end;
+        if (outbound) {
+            window_begin = std::upper_bound(time_index.begin(), time_index.end(), timepoint-time_window, TimeIndexCompare());
+            window_end   = std::upper_bound(window_begin,       time_index.end(), timepoint,             TimeIndexCompare());
+        } else {
+            window_begin = std::lower_bound(time_index.begin(), time_index.end(), timepoint,             TimeIndexCompare());
+            window_end   = std::lower_bound(window_begin,       time_index.end(), timepoint+time_window, TimeIndexCompare());
+        }
+        if (window_begin == window_end) { return; }
+
+        std::vector<int>::size_type first_new = window_indices.size();
+        window_indices.reserve(first_new + (window_end - window_begin));
+        for (StopTimesIndex::const_iterator it = window_begin; it != window_end; ++it) {
+            window_indices.push_back(it->second);
+        }
+        std::sort(window_indices.begin() + first_new, window_indices.end());
+    }
+}
+
+#endif
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fasttrips import Trip
+from fasttrips import Util
+
+
+@pytest.mark.parametrize("num_trips", [1, 2, 50])
+@pytest.mark.basic
+@pytest.mark.travis
+def test_cumsum_by_sorted_group_matches_groupby(num_trips):
+    """
+    The segmented cumsum used for updated trip times should match a groupby cumsum,
+    including the null travel time at the last stop of each trip.
+    """
+    np.random.seed(num_trips)
+    stops_per_trip = np.random.randint(1, 30, size=num_trips)
+    trips_df = pd.DataFrame({
+        Trip.STOPTIMES_COLUMN_TRIP_ID_NUM: np.repeat(np.arange(1, num_trips+1), stops_per_trip),
+        "travel_dwell_sec"               : np.random.uniform(0.0, 600.0, size=stops_per_trip.sum()),
+    })
+    # last stop of each trip has no travel time, plus a few missing ones mid-trip
+    last_stops = np.cumsum(stops_per_trip) - 1
+    trips_df.loc[last_stops, "travel_dwell_sec"] = np.nan
+    trips_df.loc[trips_df.sample(frac=0.05, random_state=num_trips).index, "travel_dwell_sec"] = np.nan
+
+    expected = trips_df.groupby(Trip.STOPTIMES_COLUMN_TRIP_ID_NUM)["travel_dwell_sec"].cumsum()
+    result   = Util.cumsum_by_sorted_group(trips_df["travel_dwell_sec"].values,
+                                           trips_df[Trip.STOPTIMES_COLUMN_TRIP_ID_NUM].values)
+
+    # one running sum over all trips carries a little floating point error
+    np.testing.assert_allclose(result, expected.values, rtol=0, atol=1e-6)
+
+
+@pytest.mark.basic
+@pytest.mark.travis
+def test_cumsum_by_sorted_group_empty():
+    result = Util.cumsum_by_sorted_group(np.array([], dtype=np.float64), np.array([], dtype=np.int32))
+    assert len(result) == 0
@@ -0,0 +1,65 @@
+import os
+import subprocess
+from distutils.spawn import find_executable
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+
+# Compares findStopTimesWithinWindow() against a linear scan of the same stop times
+HARNESS_SOURCE = r"""
+#include <cstdlib>
+#include <iostream>
+#include "stop_times_index.h"
+
+using namespace fasttrips;
+
+int main()
+{
+    std::srand(12345);
+    for (int trial = 0; trial < 2000; ++trial) {
+        // stop times in minutes after midnight, on a coarse grid so window edges get hit exactly
+        int num_times = std::rand() % 40;
+        std::vector<double> times;
+        StopTimesIndex time_index;
+        for (int i = 0; i < num_times; ++i) {
+            times.push_back(0.5*(std::rand() % 200));
+            time_index.push_back(std::make_pair(times.back(), i));
+        }
+        std::sort(time_index.begin(), time_index.end());
+
+        double timepoint   = 0.5*(std::rand() % 200);
+        double time_window = 0.5*(std::rand() % 60);
+        for (int outbound = 0; outbound <= 1; ++outbound) {
+            std::vector<int> expected;
+            for (int i = 0; i < num_times; ++i) {
+                if ( outbound && (times[i] >  timepoint-time_window) && (times[i] <= timepoint            )) { expected.push_back(i); }
+                if (!outbound && (times[i] >= timepoint            ) && (times[i] <  timepoint+time_window)) { expected.push_back(i); }
+            }
+            std::vector<int> result;
+            findStopTimesWithinWindow(time_index, outbound == 1, timepoint, time_window, result);
+            if (result != expected) {
+                std::cerr << "mismatch: trial " << trial << " outbound " << outbound << " timepoint " << timepoint
+                          << " window " << time_window << " expected " << expected.size() << " got " << result.size() << std::endl;
+                return 1;
+            }
+        }
+    }
+    return 0;
+}
+"""
+
+@pytest.mark.basic
+@pytest.mark.travis
+@pytest.mark.skipif(find_executable("g++") is None, reason="requires g++")
+def test_stop_times_within_window(tmpdir):
+    """
+    The binary search for a stop's trips within the time window should find the same trips,
+    in the same order, as scanning all of them.
+    """
+    harness_cpp = tmpdir.join("stop_times_index_harness.cpp")
+    harness_cpp.write(HARNESS_SOURCE)
+    harness_exe = str(tmpdir.join("stop_times_index_harness"))
+
+    subprocess.check_call(["g++", "-std=c++11", "-I", SRC_DIR, str(harness_cpp), "-o", harness_exe])
+    assert subprocess.call([harness_exe]) == 0